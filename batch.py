@@ -0,0 +1,179 @@
+# batch.py (headless bulk solving, see solve.py --batch)
+#
+# Puzzles come from a directory of puzzle files (one board per file, rows
+# on separate lines), a single file of boards separated by blank lines, or
+# JSON Lines from a .jsonl file or stdin ('-'). Each line is a board as a
+# list of rows or as text, or an object {"id": ..., "puzzle": ...}.
+#
+# They are solved on a process pool and one JSON line per puzzle is written
+# as soon as it finishes, so results come out in completion order (each
+# line carries the puzzle's id) and only a few puzzles are in flight at a
+# time. Nothing here imports pygame or Flask.
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import board
+import grid
+import modes
+import search
+import store
+
+INVALID_INPUT = 'Invalid input format. Please enter numbers only.'
+
+
+def parse_rows(rows):
+    # Returns (puzzle, None), else (None, error); rows are lists of numbers
+    # or lines of text
+    try:
+        puzzle = [[int(val) for val in (row.split() if isinstance(row, str) else row)] for row in rows]
+    except (ValueError, TypeError):
+        return None, INVALID_INPUT
+    return puzzle, grid.check_puzzle(puzzle)
+
+
+def read_puzzle_file(path):
+    try:
+        with open(path) as f:
+            lines = [line for line in f if line.strip()]
+    except (OSError, UnicodeDecodeError) as e:
+        return None, f'Could not read the file: {e}'
+    return parse_rows(lines)
+
+
+def read_blocks(path):
+    # Boards separated by blank lines, as (id, puzzle, error)
+    name = os.path.basename(path)
+    block = []
+    count = 0
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                block.append(line)
+            elif block:
+                count += 1
+                yield (f'{name}:{count}', *parse_rows(block))
+                block = []
+    if block:
+        yield (f'{name}:{count + 1}', *parse_rows(block))
+
+
+def read_json_lines(lines):
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError:
+            yield number, None, 'Invalid JSON.'
+            continue
+        item_id = number
+        if isinstance(item, dict):
+            item_id = item.get('id', number)
+            item = item.get('puzzle')
+        if isinstance(item, str):
+            item = item.strip().split('\n')
+        if not isinstance(item, list):
+            yield item_id, None, INVALID_INPUT
+            continue
+        yield (item_id, *parse_rows(item))
+
+
+def read_puzzles(source):
+    # (id, puzzle, error) for every board in source, read lazily
+    if source == '-':
+        yield from read_json_lines(sys.stdin)
+    elif os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            path = os.path.join(source, name)
+            if os.path.isfile(path):
+                yield (name, *read_puzzle_file(path))
+    elif source.endswith('.jsonl'):
+        with open(source) as f:
+            yield from read_json_lines(f)
+    else:
+        yield from read_blocks(source)
+
+
+# The store of the current pool process, opened on first use
+_store = None
+
+
+def _open_store(path):
+    global _store
+    if _store is None or _store.path != path:
+        _store = store.open_store(path)
+    return _store
+
+
+def solve_item(item_id, puzzle, options):
+    # Runs in a pool process; returns the result line as a dict. options
+    # are those of run_batch.
+    start_time = time.time()
+    result = {'id': item_id}
+    try:
+        # The store is keyed by packed 4x4 boards
+        solution_store = None
+        if options['store'] and grid.geometry(puzzle) is board:
+            solution_store = _open_store(options['store'])
+        moves = solution_store.get(puzzle) if solution_store else None
+        optimal = moves is not None
+        stats = search.SearchStats()
+        if moves is None:
+            budget = search.Budget(seconds=options['timeout']) if options['timeout'] else None
+            moves, optimal = modes.solve(puzzle, options['mode'], options['heuristic'], options['weight'],
+                                         options['width'], options['deadline'], stats=stats, budget=budget)
+            if moves is not None and optimal and solution_store:
+                solution_store.put(puzzle, moves)
+    except search.BudgetExceeded as e:
+        result.update(success=False, error=f'Search budget exhausted ({e.reason}).', budget_exceeded=e.reason,
+                      lower_bound=e.bound, nodes=e.nodes, time=time.time() - start_time)
+        return result
+    except Exception as e:
+        result.update(success=False, error=f'An error occurred: {str(e)}', time=time.time() - start_time)
+        return result
+    if moves is None:
+        result.update(success=False, error='No solution found.', time=time.time() - start_time)
+        return result
+    result.update(success=True, moves=board.encode_moves(moves) if options['format'] == 'compact' else moves,
+                  length=len(moves), optimal=optimal, time=time.time() - start_time, nodes=stats.nodes)
+    return result
+
+
+def run_batch(source, out, workers=None, mode='optimal', heuristic='manhattan_linear_conflict',
+              weight=modes.DEFAULT_WEIGHT, width=modes.DEFAULT_WIDTH, deadline=modes.DEFAULT_DEADLINE,
+              timeout=None, move_format='words', store_path=None):
+    # Solves every puzzle in source on workers processes (default: one per
+    # CPU), writing a JSON line to out for each. timeout is seconds per
+    # puzzle. Returns (solved, failed).
+    options = {'mode': mode, 'heuristic': heuristic, 'weight': weight, 'width': width, 'deadline': deadline,
+               'timeout': timeout, 'format': move_format, 'store': store_path}
+    workers = workers or os.cpu_count() or 1
+    counts = [0, 0]
+
+    def write(result):
+        out.write(json.dumps(result) + '\n')
+        out.flush()
+        counts[0 if result['success'] else 1] += 1
+
+    def write_done(futures):
+        for future in futures:
+            write(future.result())
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for item_id, puzzle, error in read_puzzles(source):
+            if error:
+                write({'id': item_id, 'success': False, 'error': error})
+                continue
+            pending.add(pool.submit(solve_item, item_id, puzzle, options))
+            # Keep every process busy without reading the whole input ahead
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                write_done(done)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            write_done(done)
+    return tuple(counts)
@@ -0,0 +1,396 @@
+# benchmark.py (solver benchmark harness)
+#
+# Runs ida_star over fixed instance sets and reports, for every instance and
+# heuristic, the nodes expanded, nodes per second, wall time and solution
+# length. Results are written as JSON (--out) so runs of different versions
+# can be compared (--compare).
+#
+# Sets:
+#   korf            Korf's 100 random 15-puzzles (1985) with his published
+#                   optimal lengths, in his order, so korf#N is his
+#                   instance N
+#   easy, medium, hard
+#                   seeded random walks of 20, 35 and 50 moves from the
+#                   goal, the same on every run
+#   puzzle1         puzzle1.txt
+#
+# --import-budget instead times how long a fresh interpreter takes to import
+# the headless solver modules, and fails if that is over budget or pulls in
+# pygame or Flask.
+#
+# Korf's boards (and --file) use his layout: 16 numbers row by row with the
+# goal 0 1 2 ... 15, blank first. They are converted to this repo's goal by
+# rotating the board 180 degrees and relabelling tile v as 16 - v, which
+# keeps every solution length.
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+import board
+import search
+
+KORF_INSTANCES = '''
+14 13 15 7 11 12 9 5 6 0 2 1 4 8 10 3 57
+13 5 4 10 9 12 8 14 2 3 7 1 0 15 11 6 55
+14 7 8 2 13 11 10 4 9 12 5 0 3 6 1 15 59
+5 12 10 7 15 11 14 0 8 2 1 13 3 4 9 6 56
+4 7 14 13 10 3 9 12 11 5 6 15 1 2 8 0 56
+14 7 1 9 12 3 6 15 8 11 2 5 10 0 4 13 52
+2 11 15 5 13 4 6 7 12 8 10 1 9 3 14 0 52
+12 11 15 3 8 0 4 2 6 13 9 5 14 1 10 7 50
+3 14 9 11 5 4 8 2 13 12 6 7 10 1 15 0 46
+13 11 8 9 0 15 7 10 4 3 6 14 5 12 2 1 59
+5 9 13 14 6 3 7 12 10 8 4 0 15 2 11 1 57
+14 1 9 6 4 8 12 5 7 2 3 0 10 11 13 15 45
+3 6 5 2 10 0 15 14 1 4 13 12 9 8 11 7 46
+7 6 8 1 11 5 14 10 3 4 9 13 15 2 0 12 59
+13 11 4 12 1 8 9 15 6 5 14 2 7 3 10 0 62
+1 3 2 5 10 9 15 6 8 14 13 11 12 4 7 0 42
+15 14 0 4 11 1 6 13 7 5 8 9 3 2 10 12 66
+6 0 14 12 1 15 9 10 11 4 7 2 8 3 5 13 55
+7 11 8 3 14 0 6 15 1 4 13 9 5 12 2 10 46
+6 12 11 3 13 7 9 15 2 14 8 10 4 1 5 0 52
+12 8 14 6 11 4 7 0 5 1 10 15 3 13 9 2 54
+14 3 9 1 15 8 4 5 11 7 10 13 0 2 12 6 59
+10 9 3 11 0 13 2 14 5 6 4 7 8 15 1 12 49
+7 3 14 13 4 1 10 8 5 12 9 11 2 15 6 0 54
+11 4 2 7 1 0 10 15 6 9 14 8 3 13 5 12 52
+5 7 3 12 15 13 14 8 0 10 9 6 1 4 2 11 58
+14 1 8 15 2 6 0 3 9 12 10 13 4 7 5 11 53
+13 14 6 12 4 5 1 0 9 3 10 2 15 11 8 7 52
+9 8 0 2 15 1 4 14 3 10 7 5 11 13 6 12 54
+12 15 2 6 1 14 4 8 5 3 7 0 10 13 9 11 47
+12 8 15 13 1 0 5 4 6 3 2 11 9 7 14 10 50
+14 10 9 4 13 6 5 8 2 12 7 0 1 3 11 15 59
+14 3 5 15 11 6 13 9 0 10 2 12 4 1 7 8 60
+6 11 7 8 13 2 5 4 1 10 3 9 14 0 12 15 52
+1 6 12 14 3 2 15 8 4 5 13 9 0 7 11 10 55
+12 6 0 4 7 3 15 1 13 9 8 11 2 14 5 10 52
+8 1 7 12 11 0 10 5 9 15 6 13 14 2 3 4 58
+7 15 8 2 13 6 3 12 11 0 4 10 9 5 1 14 53
+9 0 4 10 1 14 15 3 12 6 5 7 11 13 8 2 49
+11 5 1 14 4 12 10 0 2 7 13 3 9 15 6 8 54
+8 13 10 9 11 3 15 6 0 1 2 14 12 5 4 7 54
+4 5 7 2 9 14 12 13 0 3 6 11 8 1 15 10 42
+11 15 14 13 1 9 10 4 3 6 2 12 7 5 8 0 64
+12 9 0 6 8 3 5 14 2 4 11 7 10 1 15 13 50
+3 14 9 7 12 15 0 4 1 8 5 6 11 10 2 13 51
+8 4 6 1 14 12 2 15 13 10 9 5 3 7 0 11 49
+6 10 1 14 15 8 3 5 13 0 2 7 4 9 11 12 47
+8 11 4 6 7 3 10 9 2 12 15 13 0 1 5 14 49
+10 0 2 4 5 1 6 12 11 13 9 7 15 3 14 8 59
+12 5 13 11 2 10 0 9 7 8 4 3 14 6 15 1 53
+10 2 8 4 15 0 1 14 11 13 3 6 9 7 5 12 56
+10 8 0 12 3 7 6 2 1 14 4 11 15 13 9 5 56
+14 9 12 13 15 4 8 10 0 2 1 7 3 11 5 6 64
+12 11 0 8 10 2 13 15 5 4 7 3 6 9 14 1 56
+13 8 14 3 9 1 0 7 15 5 4 10 12 2 6 11 41
+3 15 2 5 11 6 4 7 12 9 1 0 13 14 10 8 55
+5 11 6 9 4 13 12 0 8 2 15 10 1 7 3 14 50
+5 0 15 8 4 6 1 14 10 11 3 9 7 12 2 13 51
+15 14 6 7 10 1 0 11 12 8 4 9 2 5 13 3 57
+11 14 13 1 2 3 12 4 15 7 9 5 10 6 8 0 66
+6 13 3 2 11 9 5 10 1 7 12 14 8 4 0 15 45
+4 6 12 0 14 2 9 13 11 8 3 15 7 10 1 5 57
+8 10 9 11 14 1 7 15 13 4 0 12 6 2 5 3 56
+5 2 14 0 7 8 6 3 11 12 13 15 4 10 9 1 51
+7 8 3 2 10 12 4 6 11 13 5 15 0 1 9 14 47
+11 6 14 12 3 5 1 15 8 0 10 13 9 7 4 2 61
+7 1 2 4 8 3 6 11 10 15 0 5 14 12 13 9 50
+7 3 1 13 12 10 5 2 8 0 6 11 14 15 4 9 51
+6 0 5 15 1 14 4 9 2 13 8 10 11 12 7 3 53
+15 1 3 12 4 0 6 5 2 8 14 9 13 10 7 11 52
+5 7 0 11 12 1 9 10 15 6 2 3 8 4 13 14 44
+12 15 11 10 4 5 14 0 13 7 1 2 9 8 3 6 56
+6 14 10 5 15 8 7 1 3 4 2 0 12 9 11 13 49
+14 13 4 11 15 8 6 9 0 7 3 1 2 10 12 5 56
+14 4 0 10 6 5 1 3 9 2 13 15 12 7 8 11 48
+15 10 8 3 0 6 9 5 1 14 13 11 7 2 12 4 57
+0 13 2 4 12 14 6 9 15 1 10 3 11 5 8 7 54
+3 14 13 6 4 15 8 9 5 12 10 0 2 7 1 11 53
+0 1 9 7 11 13 5 3 14 12 4 2 8 6 10 15 42
+11 0 15 8 13 12 3 5 10 1 4 6 14 9 7 2 57
+13 0 9 12 11 6 3 5 15 8 1 10 4 14 2 7 53
+14 10 2 1 13 9 8 11 7 3 6 12 15 5 4 0 62
+12 3 9 1 4 5 10 2 6 11 15 0 14 7 13 8 49
+15 8 10 7 0 12 14 1 5 9 6 3 13 11 4 2 55
+4 7 13 10 1 2 9 6 12 8 14 5 3 0 11 15 44
+6 0 5 10 11 12 9 2 1 7 4 3 14 8 13 15 45
+9 5 11 10 13 0 2 1 8 6 14 12 4 7 3 15 52
+15 2 12 11 14 13 9 5 1 3 8 7 0 10 6 4 65
+11 1 7 4 10 13 3 8 9 14 0 15 6 5 2 12 54
+5 4 7 1 11 12 14 15 10 13 8 6 2 0 9 3 50
+9 7 5 2 14 15 12 10 11 3 6 1 8 13 0 4 57
+3 2 7 9 0 15 12 4 6 11 5 14 8 13 10 1 57
+13 9 14 6 12 8 1 2 3 4 0 7 5 10 11 15 46
+5 7 11 8 0 14 9 13 10 12 3 15 6 1 4 2 53
+4 3 6 13 7 15 9 0 10 5 8 11 2 12 1 14 50
+1 7 15 14 2 6 4 9 12 11 13 3 0 8 5 10 49
+9 14 5 7 8 15 1 2 10 4 13 6 12 0 11 3 44
+0 11 3 12 5 2 1 9 8 10 14 15 7 4 13 6 54
+7 15 4 0 10 9 2 5 12 11 13 6 1 3 14 8 57
+11 4 0 8 6 10 5 13 12 7 14 3 1 2 9 15 54
+'''
+
+# name -> (random walk length, number of boards, seed)
+GRADED_SETS = {
+    'easy': (20, 20, 1),
+    'medium': (35, 20, 2),
+    'hard': (50, 10, 3),
+}
+SETS = ('korf',) + tuple(GRADED_SETS) + ('puzzle1',)
+DEFAULT_SETS = ('easy', 'medium')
+
+
+def korf_to_board(numbers):
+    cells = [0] * board.CELLS
+    for i, val in enumerate(numbers):
+        cells[board.CELLS - 1 - i] = 0 if val == 0 else board.CELLS - val
+    return [cells[r * board.SIZE:(r + 1) * board.SIZE] for r in range(board.SIZE)]
+
+
+def read_korf(text):
+    # One board per line: 16 numbers, optionally followed by the optimal
+    # length. Returns [(puzzle, optimal or None), ...]
+    instances = []
+    for line in text.splitlines():
+        numbers = [int(x) for x in line.split()]
+        if not numbers:
+            continue
+        if len(numbers) not in (board.CELLS, board.CELLS + 1) or sorted(numbers[:board.CELLS]) != list(range(board.CELLS)):
+            raise ValueError(f"Bad instance line: {line!r}")
+        optimal = numbers[board.CELLS] if len(numbers) > board.CELLS else None
+        instances.append((korf_to_board(numbers[:board.CELLS]), optimal))
+    return instances
+
+
+def random_walk(length, rng):
+    # Walk from the goal without undoing the previous move
+    state, blank = board.GOAL_STATE, board.GOAL_BLANK
+    last = None
+    for _ in range(length):
+        move, target = rng.choice([n for n in board.NEIGHBORS[blank] if last is None or n[0] != board.OPPOSITE[last]])
+        state = board.slide(state, blank, target)
+        blank = target
+        last = move
+    return board.unpack(state)
+
+
+def load_set(name):
+    if name == 'korf':
+        return read_korf(KORF_INSTANCES)
+    if name == 'puzzle1':
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'puzzle1.txt')
+        with open(path) as f:
+            return [([list(map(int, line.split())) for line in f if line.strip()], None)]
+    length, count, seed = GRADED_SETS[name]
+    rng = random.Random(seed)
+    return [(random_walk(length, rng), None) for _ in range(count)]
+
+
+def run_instance(puzzle, heuristic, pruning, workers, timeout):
+    stats = search.SearchStats()
+    check = None
+    if timeout:
+        deadline = time.perf_counter() + timeout
+
+        def check():
+            if time.perf_counter() > deadline:
+                raise search.SearchCancelled()
+
+    start_time = time.perf_counter()
+    try:
+        moves = search.ida_star(puzzle, heuristic, pruning, workers=workers, stats=stats, check=check)
+        timed_out = False
+    except search.SearchCancelled:
+        moves = None
+        timed_out = True
+    elapsed = time.perf_counter() - start_time
+
+    if moves is not None:
+        state, _ = board.apply_moves(*board.pack(puzzle), moves)
+        if state != board.GOAL_STATE:
+            raise RuntimeError(f"Solution does not reach the goal: {board.encode_moves(moves)}")
+    return {
+        'length': len(moves) if moves is not None else None,
+        'nodes': stats.nodes,
+        'time': elapsed,
+        'nodes_per_sec': stats.nodes / elapsed if elapsed > 0 else 0.0,
+        'iterations': stats.iterations,
+        'threshold': stats.threshold,
+        'timed_out': timed_out,
+        'moves': board.encode_moves(moves) if moves is not None else None,
+    }
+
+
+def summarize(results):
+    # Totals per heuristic and pruning mode
+    summary = {}
+    for result in results:
+        key = f"{result['heuristic']}/{result['pruning']}"
+        entry = summary.setdefault(key, {'instances': 0, 'solved': 0, 'nodes': 0, 'time': 0.0})
+        entry['instances'] += 1
+        if result['length'] is not None:
+            entry['solved'] += 1
+        entry['nodes'] += result['nodes']
+        entry['time'] += result['time']
+    for entry in summary.values():
+        entry['nodes_per_sec'] = entry['nodes'] / entry['time'] if entry['time'] > 0 else 0.0
+    return summary
+
+
+def compare(old_path, results):
+    # Node and time ratios against an earlier run, over the instances both
+    # runs solved
+    with open(old_path) as f:
+        old = {(r['set'], r['id'], r['heuristic'], r['pruning']): r for r in json.load(f)['results']}
+    totals = {}
+    for result in results:
+        before = old.get((result['set'], result['id'], result['heuristic'], result['pruning']))
+        if before is None or before['length'] is None or result['length'] is None:
+            continue
+        if before['length'] != result['length']:
+            print(f"⚠️  {result['set']}#{result['id']}: length changed {before['length']} -> {result['length']}")
+        entry = totals.setdefault(f"{result['heuristic']}/{result['pruning']}", [0, 0, 0.0, 0.0, 0])
+        entry[0] += before['nodes']
+        entry[1] += result['nodes']
+        entry[2] += before['time']
+        entry[3] += result['time']
+        entry[4] += 1
+    print(f"\nCompared with {old_path}:")
+    if not totals:
+        print("  no instances in common")
+    for key, (old_nodes, new_nodes, old_time, new_time, count) in totals.items():
+        print(f"  {key}: {count} instances, nodes x{new_nodes / max(old_nodes, 1):.3f}, "
+              f"time x{new_time / max(old_time, 1e-9):.3f}")
+
+
+# Median seconds a fresh interpreter may take to import each headless
+# module; short-lived solver processes pay this on every start
+IMPORT_BUDGET = 0.1
+IMPORT_RUNS = 7
+HEADLESS_MODULES = ('solve', 'search', 'heuristics')
+GUI_AND_WEB_MODULES = ('pygame', 'flask')
+
+
+def import_time(module, runs=IMPORT_RUNS):
+    # (median seconds, GUI and web modules it loaded) for importing module
+    # in fresh interpreters, not counting interpreter startup
+    code = (f"import sys, time; start = time.perf_counter(); import {module}; "
+            f"print(time.perf_counter() - start, "
+            f"*(name for name in {GUI_AND_WEB_MODULES!r} if name in sys.modules))")
+    times = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+        fields = output.strip().splitlines()[-1].split()
+        times.append(float(fields[0]))
+    return sorted(times)[len(times) // 2], fields[1:]
+
+
+def check_imports(budget):
+    # Prints the import time of every headless module; False if any is
+    # over budget or loads the GUI or web stack
+    ok = True
+    for module in HEADLESS_MODULES:
+        seconds, loaded = import_time(module)
+        status = 'ok'
+        if seconds > budget:
+            status = f'over the {budget * 1000:.0f} ms budget'
+            ok = False
+        if loaded:
+            status = f"imports {', '.join(loaded)}"
+            ok = False
+        print(f"import {module}: {seconds * 1000:.1f} ms, {status}")
+    return ok
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the IDA* solver on fixed instance sets.")
+    parser.add_argument("--set", dest="sets", action="append", choices=SETS,
+                        help=f"instance set, may be repeated (default: {' '.join(DEFAULT_SETS)})")
+    parser.add_argument("--file", action="append", default=[],
+                        help="extra instances, one per line in Korf's layout, optionally followed by the optimal length")
+    parser.add_argument("--heuristic", action="append",
+                        help="heuristic, may be repeated (default: manhattan_linear_conflict)")
+    parser.add_argument("--pruning", default="parent", help="move pruning: parent or fsm (default: parent)")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes per search (default: 1)")
+    parser.add_argument("--limit", type=int, help="only the first N instances of each set")
+    parser.add_argument("--timeout", type=float, help="seconds per instance before giving up")
+    parser.add_argument("--out", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--import-budget", type=float, nargs="?", const=IMPORT_BUDGET, metavar="SECONDS",
+                        help="only check that the headless modules import within SECONDS without pygame or "
+                             f"Flask (default budget: {IMPORT_BUDGET})")
+    args = parser.parse_args()
+
+    if args.import_budget is not None:
+        sys.exit(0 if check_imports(args.import_budget) else 1)
+
+    instance_sets = [(name, load_set(name)) for name in args.sets or DEFAULT_SETS]
+    for path in args.file:
+        with open(path) as f:
+            instance_sets.append((os.path.basename(path), read_korf(f.read())))
+    heuristic_names = args.heuristic or ['manhattan_linear_conflict']
+
+    results = []
+    failed = False
+    for heuristic in heuristic_names:
+        # Build tables, memos and the pruner outside the timed runs
+        try:
+            search.ida_star(board.goal, heuristic, args.pruning)
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        for set_name, instances in instance_sets:
+            for index, (puzzle, optimal) in enumerate(instances[:args.limit], 1):
+                result = {'set': set_name, 'id': index, 'heuristic': heuristic, 'pruning': args.pruning,
+                          'workers': args.workers, 'optimal': optimal}
+                result.update(run_instance(puzzle, heuristic, args.pruning, args.workers, args.timeout))
+                results.append(result)
+                status = 'timeout' if result['timed_out'] else f"{result['length']} moves"
+                if optimal is not None and result['length'] is not None and result['length'] != optimal:
+                    status += f" (expected {optimal})"
+                    failed = True
+                print(f"{set_name}#{index} {heuristic}: {status}, {result['nodes']} nodes, "
+                      f"{result['time']:.2f}s, {result['nodes_per_sec']:.0f} nodes/s", flush=True)
+
+    summary = summarize(results)
+    print("\nSummary:")
+    for key, entry in summary.items():
+        print(f"  {key}: {entry['solved']}/{entry['instances']} solved, {entry['nodes']} nodes, "
+              f"{entry['time']:.2f}s, {entry['nodes_per_sec']:.0f} nodes/s")
+
+    if args.out:
+        report = {
+            'revision': git_revision(),
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'args': vars(args),
+            'summary': summary,
+            'results': results,
+        }
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.out}")
+
+    if args.compare:
+        compare(args.compare, results)
+
+    if failed:
+        print("Error: some solution lengths differ from the known optimum.")
+        sys.exit(1)
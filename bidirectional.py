@@ -0,0 +1,130 @@
+# bidirectional.py (MM bidirectional search, see board.py)
+#
+# Searches forward from the start board and backward from the goal at the
+# same time, meeting in the middle (Holte et al., "MM: Bidirectional Search
+# That Is Guaranteed to Meet in the Middle", 2016). Each side keeps an open
+# list ordered by pr(n) = max(g + h, 2g), so neither side searches past half
+# the solution length. The shortest path through a board reached from both
+# sides is the answer once it is no longer than the smallest pr on either
+# open list.
+#
+# The forward side uses the chosen heuristic, the backward side Manhattan
+# distance plus linear conflicts towards the start board
+# (grid.ManhattanLinearConflict). Ties go to the deeper board, which lets
+# the two sides meet sooner. Unlike IDA*, every reached board is stored, so
+# the search stops once its tables would pass a memory cap, and
+# bidirectional() falls back to IDA*.
+import heapq
+
+import board
+import grid
+import search
+
+# Rough bytes per stored board: g and parent dict entries on each side and
+# a heap entry
+ENTRY_BYTES = 400
+DEFAULT_MAX_MEMORY = 256 * 1024 * 1024
+
+
+class MemoryCapExceeded(Exception):
+    pass
+
+
+def _path(parents, state):
+    # Moves from the root of parents to state
+    moves = []
+    while parents[state] is not None:
+        state, move = parents[state]
+        moves.append(move)
+    moves.reverse()
+    return moves
+
+
+def mm_search(start, heuristic='manhattan_linear_conflict', max_memory=DEFAULT_MAX_MEMORY, stats=None, check=None,
+              budget=None):
+    # Returns the shortest move list, or None if there is none. Raises
+    # MemoryCapExceeded when the stored boards would take more than
+    # max_memory bytes. check() and the budget are called every
+    # search.CHECK_MASK + 1 expansions.
+    geometry = grid.geometry(start)
+    state, blank = geometry.pack(start)
+    if state == geometry.GOAL_STATE:
+        return []
+    max_entries = max_memory // ENTRY_BYTES if max_memory else None
+    check = search.with_budget(check, budget)
+    backward_heur = grid.ManhattanLinearConflict(geometry, state)
+    sides = []
+    for root, root_blank, heur in ((state, blank, grid.get_heuristic(geometry, heuristic)),
+                                   (geometry.GOAL_STATE, geometry.GOAL_BLANK, backward_heur)):
+        h = heur.reset(root, root_blank)
+        # [open heap of (pr, -g, state, blank), g of every reached board,
+        #  parent pointers, heuristic]
+        sides.append([[(h, 0, root, root_blank)], {root: 0}, {root: None}, heur])
+    forward, backward = sides
+    best = search.INF
+    meet = None
+    nodes = 0
+    if budget is not None:
+        budget.nodes = lambda: nodes
+
+    while forward[0] and backward[0]:
+        bound = min(forward[0][0][0], backward[0][0][0])
+        if best <= bound:
+            break
+        # Expand on the side with the smaller priority
+        side, other = (forward, backward) if forward[0][0][0] <= backward[0][0][0] else (backward, forward)
+        open_list, g_of, parents, heur = side
+        _, g, state, blank = heapq.heappop(open_list)
+        g = -g
+        if g_of[state] != g:
+            continue
+        nodes += 1
+        if nodes & search.CHECK_MASK == 0:
+            if check:
+                try:
+                    check()
+                except search.BudgetExceeded as e:
+                    # No solution is shorter than the smallest pr on
+                    # either open list
+                    e.bound = bound
+                    e.nodes = nodes
+                    raise
+            if max_entries is not None and len(forward[1]) + len(backward[1]) > max_entries:
+                raise MemoryCapExceeded()
+        h = heur.reset(state, blank)
+        other_g = other[1]
+        for move, target in geometry.NEIGHBORS[blank]:
+            child = geometry.slide(state, blank, target)
+            child_g = g + 1
+            if g_of.get(child, search.INF) <= child_g:
+                continue
+            g_of[child] = child_g
+            parents[child] = (state, move)
+            tile = geometry.tile_at(state, target)
+            child_h = heur.step(h, state, child, tile, target, blank)
+            heur.unstep(tile, target, blank)
+            heapq.heappush(open_list, (max(child_g + child_h, 2 * child_g), -child_g, child, target))
+            if child in other_g and child_g + other_g[child] < best:
+                best = child_g + other_g[child]
+                meet = child
+
+    if stats is not None:
+        stats.nodes = nodes
+        stats.iterations = 1
+        stats.threshold = best if meet is not None else None
+    if meet is None:
+        return None
+    # The backward moves were made from the goal; reversed and undone they
+    # lead from the meeting board to the goal
+    moves = _path(forward[2], meet) + [board.OPPOSITE[move] for move in reversed(_path(backward[2], meet))]
+    return [board.MOVES[move] for move in moves]
+
+
+def bidirectional(start, heuristic='manhattan_linear_conflict', max_memory=DEFAULT_MAX_MEMORY, stats=None,
+                  check=None, budget=None, **options):
+    # mm_search, or search.ida_star (with options) when it runs into the
+    # memory cap
+    try:
+        return mm_search(start, heuristic, max_memory, stats, check, budget)
+    except MemoryCapExceeded:
+        return search.ida_star(start, heuristic, stats=stats, check=check, budget=budget, **options)
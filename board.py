@@ -0,0 +1,141 @@
+# board.py (packed 4x4 board engine)
+#
+# A board is stored as one 64-bit integer with 4 bits per cell: cell
+# i = row * 4 + col lives in bits 4*i .. 4*i+3. The index of the empty cell
+# is tracked next to the integer, so a move is a couple of shifts and XORs
+# and never copies a board.
+
+SIZE = 4
+ROWS = COLS = SIZE
+CELLS = SIZE * SIZE
+# Bits per cell, as in grid.py
+BITS = 4
+
+# Goal configuration: 1..15 in order, empty space in the bottom-right corner
+goal = [[(r * SIZE + c + 1) % CELLS for c in range(SIZE)] for r in range(SIZE)]
+
+# Move names say where the EMPTY SPACE moves
+MOVES = ('up', 'down', 'left', 'right')
+MOVE_INDEX = {move: i for i, move in enumerate(MOVES)}
+OPPOSITE = (1, 0, 3, 2)
+_DELTAS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+
+def _neighbors(blank):
+    x, y = divmod(blank, SIZE)
+    result = []
+    for move, (dx, dy) in enumerate(_DELTAS):
+        nx, ny = x + dx, y + dy
+        if 0 <= nx < SIZE and 0 <= ny < SIZE:
+            result.append((move, nx * SIZE + ny))
+    return tuple(result)
+
+
+# NEIGHBORS[blank] -> ((move, cell the empty space moves to), ...)
+NEIGHBORS = tuple(_neighbors(blank) for blank in range(CELLS))
+
+# TARGET[blank][move] -> cell the empty space moves to, or -1 off the board
+TARGET = tuple(
+    tuple(dict(NEIGHBORS[blank]).get(move, -1) for move in range(len(MOVES)))
+    for blank in range(CELLS)
+)
+
+
+def pack(board):
+    state = 0
+    blank = -1
+    for i, val in enumerate(val for row in board for val in row):
+        state |= val << (i << 2)
+        if val == 0:
+            blank = i
+    return state, blank
+
+
+def unpack(state):
+    return [[(state >> ((r * SIZE + c) << 2)) & 15 for c in range(SIZE)] for r in range(SIZE)]
+
+
+GOAL_STATE, GOAL_BLANK = pack(goal)
+
+
+def tile_at(state, cell):
+    return (state >> (cell << 2)) & 15
+
+
+def slide(state, blank, target):
+    # The tile at target slides into the empty cell. The empty nibble is
+    # always 0, so XOR-ing the tile into both nibbles swaps them.
+    tile = (state >> (target << 2)) & 15
+    return state ^ (tile << (target << 2)) ^ (tile << (blank << 2))
+
+
+def apply_moves(state, blank, moves):
+    for move in moves:
+        target = TARGET[blank][MOVE_INDEX[move]]
+        if target < 0:
+            raise ValueError(f"Illegal move '{move}' from cell {blank}")
+        state = slide(state, blank, target)
+        blank = target
+    return state, blank
+
+
+# Transposing the board about its main diagonal and relabelling every tile
+# with the tile whose goal cell is the transposed one maps the goal onto
+# itself, so a board and its transpose need the same number of moves, with
+# up/left and down/right swapped.
+TRANSPOSE_CELL = tuple((cell % SIZE) * SIZE + cell // SIZE for cell in range(CELLS))
+TRANSPOSE_TILE = tuple(0 if val == 0 else TRANSPOSE_CELL[val - 1] + 1 for val in range(CELLS))
+TRANSPOSE_MOVE = (2, 3, 0, 1)
+
+
+def transpose(state):
+    result = 0
+    for cell in range(CELLS):
+        result |= TRANSPOSE_TILE[(state >> (cell << 2)) & 15] << (TRANSPOSE_CELL[cell] << 2)
+    return result
+
+
+def transpose_moves(moves):
+    return [MOVES[TRANSPOSE_MOVE[MOVE_INDEX[move]]] for move in moves]
+
+
+# Compact move strings: one letter per move
+MOVE_LETTERS = 'UDLR'
+_LETTER_INDEX = {letter: i for i, letter in enumerate(MOVE_LETTERS)}
+
+
+def encode_moves(moves):
+    return ''.join(MOVE_LETTERS[MOVE_INDEX[move]] for move in moves)
+
+
+def decode_moves(text):
+    try:
+        return [MOVES[_LETTER_INDEX[letter]] for letter in text.upper()]
+    except KeyError as e:
+        raise ValueError(f"Invalid move letter {e.args[0]!r}")
+
+
+# Moves on a board kept as a list of rows, of any size, as the GUI shows
+# it. Compact letters are accepted as well as move names.
+MOVE_NAMES = {letter: MOVES[i] for i, letter in enumerate(MOVE_LETTERS)}
+
+
+def find_blank(puzzle):
+    for i in range(len(puzzle)):
+        for j in range(len(puzzle[i])):
+            if puzzle[i][j] == 0:
+                return i, j
+
+
+def apply_move(puzzle, move):
+    # Moves the blank in place; an unknown move or one off the edge is
+    # ignored
+    move = MOVE_NAMES.get(move, move)
+    if move not in MOVE_INDEX:
+        return puzzle
+    dx, dy = _DELTAS[MOVE_INDEX[move]]
+    x, y = find_blank(puzzle)
+    nx, ny = x + dx, y + dy
+    if 0 <= nx < len(puzzle) and 0 <= ny < len(puzzle[0]):
+        puzzle[x][y], puzzle[nx][ny] = puzzle[nx][ny], puzzle[x][y]
+    return puzzle
@@ -0,0 +1,78 @@
+# cache.py (in-process cache of solved boards)
+#
+# Entries are keyed by the packed board, folded through the transpose
+# symmetry (see board.transpose): a board and its transpose share the entry
+# stored under the smaller of the two keys, and moves are mapped when the
+# board asked for is the transposed one. The cache is an LRU bounded both
+# by entry count and by an estimate of the memory the entries take.
+import sys
+import threading
+from collections import OrderedDict
+
+import board
+
+# Rough per-entry cost of the OrderedDict slot and its links
+ENTRY_OVERHEAD = 120
+
+
+def canonical(puzzle):
+    # Returns (key, transposed) where transposed says the key is the
+    # transpose of puzzle
+    state, _ = board.pack(puzzle)
+    mirrored = board.transpose(state)
+    if mirrored < state:
+        return mirrored, True
+    return state, False
+
+
+class SolutionCache:
+    def __init__(self, max_entries=10000, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, puzzle):
+        key, transposed = canonical(puzzle)
+        with self.lock:
+            encoded = self.entries.get(key)
+            if encoded is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+        moves = board.decode_moves(encoded)
+        return board.transpose_moves(moves) if transposed else moves
+
+    def put(self, puzzle, moves):
+        key, transposed = canonical(puzzle)
+        if transposed:
+            moves = board.transpose_moves(moves)
+        # One character per move keeps long solutions small
+        encoded = board.encode_moves(moves)
+        size = sys.getsizeof(key) + sys.getsizeof(encoded) + ENTRY_OVERHEAD
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.bytes -= sys.getsizeof(key) + sys.getsizeof(old) + ENTRY_OVERHEAD
+            self.entries[key] = encoded
+            self.bytes += size
+            while self.entries and (len(self.entries) > self.max_entries or self.bytes > self.max_bytes):
+                old_key, old = self.entries.popitem(last=False)
+                self.bytes -= sys.getsizeof(old_key) + sys.getsizeof(old) + ENTRY_OVERHEAD
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self.entries),
+                'bytes': self.bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes
+            }
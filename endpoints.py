@@ -1,97 +1,28 @@
-from flask import Flask, render_template_string, request, jsonify
+from flask import Flask, Response, render_template_string, request, jsonify
+import cProfile
+import json
+import math
+import queue
+import random
+import threading
 import time
 import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+import board
+import cache
+import grid
+import heuristics
+import jobs
+import metrics
+import modes
+import search
+import store
 
 app = Flask(__name__)
 
-# Goal configuration
-goal = [
-    [1, 2, 3, 4],
-    [5, 6, 7, 8],
-    [9, 10, 11, 12],
-    [13, 14, 15, 0]
-]
-goal_positions = {val: (i, j) for i, row in enumerate(goal) for j, val in enumerate(row)}
-
-def manhattan_linear_conflict(puzzle):
-    dist = 0
-    for i in range(4):
-        for j in range(4):
-            val = puzzle[i][j]
-            if val == 0:
-                continue
-            goal_i, goal_j = goal_positions[val]
-            dist += abs(goal_i - i) + abs(goal_j - j)
-            if goal_i == i:
-                for k in range(j + 1, 4):
-                    other = puzzle[i][k]
-                    if other != 0 and goal_positions[other][0] == i and goal_positions[other][1] < goal_j:
-                        dist += 2
-            if goal_j == j:
-                for k in range(i + 1, 4):
-                    other = puzzle[k][j]
-                    if other != 0 and goal_positions[other][1] == j and goal_positions[other][0] < goal_i:
-                        dist += 2
-    return dist
-
-def is_goal(p):
-    return p == goal
-
-def get_neighbors(board):
-    neighbors = []
-    for i in range(4):
-        for j in range(4):
-            if board[i][j] == 0:
-                x, y = i, j
-                # Direction represents where the EMPTY SPACE moves
-                directions = [
-                    (-1, 0, 'up'),      # Empty moves up
-                    (1, 0, 'down'),     # Empty moves down
-                    (0, -1, 'left'),    # Empty moves left
-                    (0, 1, 'right')     # Empty moves right
-                ]
-                for dx, dy, move in directions:
-                    nx, ny = x + dx, y + dy
-                    if 0 <= nx < 4 and 0 <= ny < 4:
-                        new_board = [row[:] for row in board]
-                        new_board[x][y], new_board[nx][ny] = new_board[nx][ny], new_board[x][y]
-                        neighbors.append((new_board, move))
-    return neighbors
-
-def ida_star(start):
-    threshold = manhattan_linear_conflict(start)
-    path = [(start, None)]
-    
-    def search(path, g, threshold):
-        node, _ = path[-1]
-        f = g + manhattan_linear_conflict(node)
-        if f > threshold:
-            return f
-        if is_goal(node):
-            return "FOUND"
-        min_cost = float('inf')
-        for neighbor, move in get_neighbors(node):
-            if any(prev[0] == neighbor for prev in path):
-                continue
-            path.append((neighbor, move))
-            temp = search(path, g + 1, threshold)
-            if temp == "FOUND":
-                return "FOUND"
-            if temp < min_cost:
-                min_cost = temp
-            path.pop()
-        return min_cost
-    
-    iterations = 0
-    while iterations < 50:  # Limit iterations for web safety
-        temp = search(path, 0, threshold)
-        if temp == "FOUND":
-            return [m for _, m in path[1:]]
-        if temp == float('inf'):
-            return None
-        threshold = temp
-        iterations += 1
-    return None
+def ida_star(start, heuristic='manhattan_linear_conflict', stats=None, **options):
+    return search.ida_star(start, heuristic=heuristic, max_iterations=50, stats=stats, **options)  # Limit iterations for web safety
 
 HOME_TEMPLATE = '''
 <!DOCTYPE html>
@@ -525,6 +456,17 @@ SOLVE_TEMPLATE = '''
             outline: none;
             border-color: #667eea;
         }
+        select {
+            padding: 12px 15px;
+            border: 2px solid #ddd;
+            border-radius: 10px;
+            font-size: 1em;
+            background: white;
+        }
+        select:focus {
+            outline: none;
+            border-color: #667eea;
+        }
         .file-input {
             margin-top: 20px;
         }
@@ -814,7 +756,7 @@ SOLVE_TEMPLATE = '''
 7 11 4 14
 5 0 9 15
 8 13 6 3</pre>
-                <p style="margin-top: 10px; color: #666;">Use 0 to represent the empty space. Each row should have 4 numbers separated by spaces.</p>
+                <p style="margin-top: 10px; color: #666;">Use 0 to represent the empty space. Each row should have 4 numbers separated by spaces. Other sizes from 2x2 to 6x6 work too, such as 3 rows of 3 for the 8-puzzle or 5 rows of 5 for the 24-puzzle.</p>
             </div>
 
             <div class="input-section">
@@ -828,6 +770,15 @@ SOLVE_TEMPLATE = '''
                 </div>
             </div>
 
+            <div class="input-section">
+                <label for="heuristicSelect">Heuristic:</label>
+                <select id="heuristicSelect">
+                    <option value="manhattan_linear_conflict">Manhattan Distance + Linear Conflict</option>
+                    <option value="wd">Walking Distance</option>
+                    <option value="pdb">Pattern Database (needs generated tables)</option>
+                </select>
+            </div>
+
             <div class="button-group">
                 <button class="btn btn-primary" onclick="solvePuzzle()">🚀 Solve Puzzle</button>
                 <button class="btn btn-secondary" onclick="clearInput()">🗑️ Clear</button>
@@ -836,6 +787,7 @@ SOLVE_TEMPLATE = '''
             <div class="loader" id="loader">
                 <div class="spinner"></div>
                 <p style="margin-top: 15px; color: #667eea; font-weight: bold;">Solving puzzle... This may take a moment.</p>
+                <p id="progressInfo" style="margin-top: 10px; color: #666; font-family: 'Courier New', monospace;"></p>
             </div>
 
             <div id="result"></div>
@@ -862,10 +814,11 @@ SOLVE_TEMPLATE = '''
             document.getElementById('result').style.display = 'none';
         }
 
-        function visualizePuzzle(puzzle) {
-            let html = '<div class="puzzle-visualization">';
-            for (let i = 0; i < 4; i++) {
-                for (let j = 0; j < 4; j++) {
+        // Boards of any size: one grid column per puzzle column
+        function puzzleTiles(puzzle) {
+            let html = '';
+            for (let i = 0; i < puzzle.length; i++) {
+                for (let j = 0; j < puzzle[i].length; j++) {
                     const val = puzzle[i][j];
                     if (val === 0) {
                         html += '<div class="puzzle-tile empty"></div>';
@@ -874,11 +827,10 @@ SOLVE_TEMPLATE = '''
                     }
                 }
             }
-            html += '</div>';
             return html;
         }
 
-        async function solvePuzzle() {
+        function solvePuzzle() {
             const input = document.getElementById('puzzleInput').value.trim();
             
             if (!input) {
@@ -887,106 +839,124 @@ SOLVE_TEMPLATE = '''
             }
 
             document.getElementById('loader').style.display = 'block';
+            document.getElementById('progressInfo').textContent = '';
             document.getElementById('result').style.display = 'none';
 
-            try {
-                const response = await fetch('/api/solve', {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json',
-                    },
-                    body: JSON.stringify({ puzzle: input })
+            // Stream IDA* progress while the server searches
+            if (window.solveStream) {
+                window.solveStream.close();
+            }
+            const params = new URLSearchParams({
+                puzzle: input,
+                heuristic: document.getElementById('heuristicSelect').value,
+                format: 'compact'
+            });
+            const stream = new EventSource('/api/solve/stream?' + params.toString());
+            window.solveStream = stream;
+
+            stream.addEventListener('progress', function(e) {
+                const progress = JSON.parse(e.data);
+                document.getElementById('progressInfo').textContent =
+                    `Threshold ${progress.threshold} · ${progress.nodes.toLocaleString()} nodes expanded · ` +
+                    `${progress.elapsed.toFixed(1)}s · ${Math.round(progress.nodes_per_second).toLocaleString()} nodes/s`;
+            });
+
+            stream.addEventListener('result', function(e) {
+                stream.close();
+                showResult(JSON.parse(e.data));
+            });
+
+            stream.onerror = function() {
+                stream.close();
+                showResult({
+                    success: false,
+                    error: 'An error occurred while solving the puzzle. Please try again.'
                 });
+            };
+        }
 
-                const data = await response.json();
-                
-                document.getElementById('loader').style.display = 'none';
-                const resultDiv = document.getElementById('result');
-                resultDiv.style.display = 'block';
-
-                if (data.success) {
-                    resultDiv.className = 'success';
-                    let html = `
-                        <h3>✅ Solution Found!</h3>
-                        <p><strong>Number of moves:</strong> ${data.moves.length}</p>
-                        <p><strong>Time taken:</strong> ${data.time.toFixed(2)} seconds</p>
-                        
-                        <div class="interactive-solver">
-                            <h4>🎮 Interactive Solution Player</h4>
-                            <div class="step-info">
-                                Step: <span class="current-step" id="currentStep">0</span> / ${data.moves.length}
-                            </div>
-                            <div class="move-indicator" id="moveIndicator">Press → or click Forward to start</div>
-                            <div class="puzzle-display" id="puzzleDisplay">
-                                ${visualizePuzzle(data.puzzle)}
-                            </div>
-                            <div class="controls">
-                                <button class="control-btn back" id="backBtn" onclick="previousStep()">
-                                    ← Back
-                                </button>
-                                <button class="control-btn reset" id="resetBtn" onclick="resetPuzzle()">
-                                    ⟲ Reset (Space)
-                                </button>
-                                <button class="control-btn forward" id="forwardBtn" onclick="nextStep()">
-                                    Forward →
-                                </button>
-                                <button class="control-btn auto" id="autoBtn" onclick="toggleAutoPlay()">
-                                    ▶ Auto Play
-                                </button>
-                            </div>
-                            <div class="keyboard-hints">
-                                <h5>⌨️ Keyboard Shortcuts:</h5>
-                                <span class="keyboard-hint">←</span> Previous Step
-                                <span class="keyboard-hint">→</span> Next Step
-                                <span class="keyboard-hint">Space</span> Reset to Start
-                                <span class="keyboard-hint">Enter</span> Toggle Auto Play
-                            </div>
-                        </div>
-                        
-                        <div class="moves-list">
-                            <h4>Solution Steps (Empty space moves):</h4>
-                    `;
-                    
-                    data.moves.forEach((move, index) => {
-                        html += `
-                            <div class="move-item" id="move-${index}">
-                                <span class="move-number">Move ${index + 1}:</span>
-                                <span class="move-direction">${move}</span>
-                            </div>
-                        `;
-                    });
-                    
-                    html += '</div>';
-                    resultDiv.innerHTML = html;
-                    
-                    // Initialize the interactive solver
-                    window.puzzleSolver = {
-                        initialPuzzle: JSON.parse(JSON.stringify(data.puzzle)),
-                        currentPuzzle: JSON.parse(JSON.stringify(data.puzzle)),
-                        moves: data.moves,
-                        currentStep: 0,
-                        autoPlayInterval: null
-                    };
+        function showResult(data) {
+            if (data.success && typeof data.moves === 'string') {
+                data.moves = data.moves.split('');
+            }
+            document.getElementById('loader').style.display = 'none';
+            const resultDiv = document.getElementById('result');
+            resultDiv.style.display = 'block';
+
+            if (data.success) {
+                resultDiv.className = 'success';
+                let html = `
+                    <h3>✅ Solution Found!</h3>
+                    <p><strong>Number of moves:</strong> ${data.moves.length}</p>
+                    <p><strong>Time taken:</strong> ${data.time.toFixed(2)} seconds</p>
                     
-                    updateButtons();
+                    <div class="interactive-solver">
+                        <h4>🎮 Interactive Solution Player</h4>
+                        <div class="step-info">
+                            Step: <span class="current-step" id="currentStep">0</span> / ${data.moves.length}
+                        </div>
+                        <div class="move-indicator" id="moveIndicator">Press → or click Forward to start</div>
+                        <div class="puzzle-display" id="puzzleDisplay"
+                             style="grid-template-columns: repeat(${data.puzzle[0].length}, 90px)">
+                            ${puzzleTiles(data.puzzle)}
+                        </div>
+                        <div class="controls">
+                            <button class="control-btn back" id="backBtn" onclick="previousStep()">
+                                ← Back
+                            </button>
+                            <button class="control-btn reset" id="resetBtn" onclick="resetPuzzle()">
+                                ⟲ Reset (Space)
+                            </button>
+                            <button class="control-btn forward" id="forwardBtn" onclick="nextStep()">
+                                Forward →
+                            </button>
+                            <button class="control-btn auto" id="autoBtn" onclick="toggleAutoPlay()">
+                                ▶ Auto Play
+                            </button>
+                        </div>
+                        <div class="keyboard-hints">
+                            <h5>⌨️ Keyboard Shortcuts:</h5>
+                            <span class="keyboard-hint">←</span> Previous Step
+                            <span class="keyboard-hint">→</span> Next Step
+                            <span class="keyboard-hint">Space</span> Reset to Start
+                            <span class="keyboard-hint">Enter</span> Toggle Auto Play
+                        </div>
+                    </div>
                     
-                    // Add keyboard event listeners
-                    document.addEventListener('keydown', handleKeyPress);
-                } else {
-                    resultDiv.className = 'error';
-                    resultDiv.innerHTML = `
-                        <h3>❌ Error</h3>
-                        <p>${data.error}</p>
+                    <div class="moves-list">
+                        <h4>Solution Steps (Empty space moves):</h4>
+                `;
+                
+                data.moves.forEach((move, index) => {
+                    html += `
+                        <div class="move-item" id="move-${index}">
+                            <span class="move-number">Move ${index + 1}:</span>
+                            <span class="move-direction">${moveName(move)}</span>
+                        </div>
                     `;
-                }
-            } catch (error) {
-                document.getElementById('loader').style.display = 'none';
-                const resultDiv = document.getElementById('result');
-                resultDiv.style.display = 'block';
+                });
+                
+                html += '</div>';
+                resultDiv.innerHTML = html;
+                
+                // Initialize the interactive solver
+                window.puzzleSolver = {
+                    initialPuzzle: JSON.parse(JSON.stringify(data.puzzle)),
+                    currentPuzzle: JSON.parse(JSON.stringify(data.puzzle)),
+                    moves: data.moves,
+                    currentStep: 0,
+                    autoPlayInterval: null
+                };
+                
+                updateButtons();
+                
+                // Add keyboard event listeners
+                document.addEventListener('keydown', handleKeyPress);
+            } else {
                 resultDiv.className = 'error';
                 resultDiv.innerHTML = `
                     <h3>❌ Error</h3>
-                    <p>An error occurred while solving the puzzle. Please try again.</p>
+                    <p>${data.error}</p>
                 `;
             }
         }
@@ -1014,11 +984,20 @@ SOLVE_TEMPLATE = '''
             }
         }
 
+        // Compact solutions use one letter per move
+        const MOVE_NAMES = { 'U': 'up', 'D': 'down', 'L': 'left', 'R': 'right' };
+
+        function moveName(move) {
+            return MOVE_NAMES[move] || move;
+        }
+
         function applyMove(puzzle, move) {
+            move = moveName(move);
+
             // Find the empty space (0)
             let x = 0, y = 0;
-            for (let i = 0; i < 4; i++) {
-                for (let j = 0; j < 4; j++) {
+            for (let i = 0; i < puzzle.length; i++) {
+                for (let j = 0; j < puzzle[i].length; j++) {
                     if (puzzle[i][j] === 0) {
                         x = i;
                         y = j;
@@ -1034,7 +1013,7 @@ SOLVE_TEMPLATE = '''
             else if (move === 'right') ny = y + 1;
 
             // Swap tiles
-            if (nx >= 0 && nx < 4 && ny >= 0 && ny < 4) {
+            if (nx >= 0 && nx < puzzle.length && ny >= 0 && ny < puzzle[0].length) {
                 const temp = puzzle[x][y];
                 puzzle[x][y] = puzzle[nx][ny];
                 puzzle[nx][ny] = temp;
@@ -1050,7 +1029,7 @@ SOLVE_TEMPLATE = '''
                 'left': 'right',
                 'right': 'left'
             };
-            return opposites[move];
+            return opposites[moveName(move)];
         }
 
         function updatePuzzleDisplay() {
@@ -1058,18 +1037,7 @@ SOLVE_TEMPLATE = '''
             const puzzleDisplay = document.getElementById('puzzleDisplay');
             
             // Clear and rebuild puzzle display
-            let html = '';
-            for (let i = 0; i < 4; i++) {
-                for (let j = 0; j < 4; j++) {
-                    const val = solver.currentPuzzle[i][j];
-                    if (val === 0) {
-                        html += '<div class="puzzle-tile empty"></div>';
-                    } else {
-                        html += `<div class="puzzle-tile">${val}</div>`;
-                    }
-                }
-            }
-            puzzleDisplay.innerHTML = html;
+            puzzleDisplay.innerHTML = puzzleTiles(solver.currentPuzzle);
             
             document.getElementById('currentStep').textContent = solver.currentStep;
             
@@ -1080,7 +1048,7 @@ SOLVE_TEMPLATE = '''
             } else if (solver.currentStep === solver.moves.length) {
                 moveIndicator.textContent = '🎉 Puzzle Solved!';
             } else {
-                moveIndicator.textContent = `Last move: Empty space moved ${solver.moves[solver.currentStep - 1]}`;
+                moveIndicator.textContent = `Last move: Empty space moved ${moveName(solver.moves[solver.currentStep - 1])}`;
             }
             
             // Highlight current move in the list
@@ -1176,93 +1144,645 @@ def home():
 def solve():
     return render_template_string(SOLVE_TEMPLATE)
 
+UNSOLVABLE_ERROR = grid.UNSOLVABLE_ERROR
+
+def parse_puzzle(puzzle_text, heuristic='manhattan_linear_conflict'):
+    # Returns (puzzle, None) for a valid, solvable puzzle, else (None, error).
+    # Any rows x cols board from grid.MIN_SIDE to grid.MAX_SIDE on a side
+    # is accepted (3x3 is the 8-puzzle, 5x5 the 24-puzzle); heuristic has
+    # to work on that size.
+    try:
+        if isinstance(puzzle_text, list):
+            puzzle_text = '\n'.join(' '.join(str(num) for num in row) for row in puzzle_text)
+
+        # Parse the puzzle input
+        lines = [line.strip() for line in puzzle_text.strip().split('\n') if line.strip()]
+        puzzle = [list(map(int, line.split())) for line in lines]
+    except (ValueError, TypeError, AttributeError):
+        return None, 'Invalid input format. Please enter numbers only.'
+
+    error = grid.check_puzzle(puzzle)
+    if error:
+        return None, error
+
+    try:
+        grid.get_heuristic(grid.geometry(puzzle), heuristic)
+    except ValueError as e:
+        return None, str(e)
+
+    return puzzle, None
+
+# Solved boards, shared by every route in this process
+solution_cache = cache.SolutionCache(
+    max_entries=int(os.environ.get('PUZZLE_CACHE_ENTRIES', '10000')),
+    max_bytes=int(os.environ.get('PUZZLE_CACHE_BYTES', str(64 * 1024 * 1024))))
+# Optional SQLite store that survives restarts and is shared by workers
+solution_store = store.open_store(os.environ.get('PUZZLE_STORE'))
+
+def lookup_solution(puzzle):
+    # In-process cache first, then the persistent store. Both are keyed by
+    # 4x4 boards; other sizes are always searched.
+    if grid.geometry(puzzle) is not board:
+        return None
+    moves = solution_cache.get(puzzle)
+    if moves is None and solution_store is not None:
+        moves = solution_store.get(puzzle)
+        if moves is not None:
+            solution_cache.put(puzzle, moves)
+    return moves
+
+def remember_solution(puzzle, moves):
+    if grid.geometry(puzzle) is not board:
+        return
+    solution_cache.put(puzzle, moves)
+    if solution_store is not None:
+        solution_store.put(puzzle, moves)
+
+# Metrics served at /metrics. Solve routes record into them once per solve,
+# after the search has finished.
+registry = metrics.Registry()
+REQUESTS = registry.register(metrics.Counter(
+    'puzzle_http_requests_total', 'HTTP requests by route and status.', ('endpoint', 'method', 'status')))
+SOLVE_SECONDS = registry.register(metrics.Histogram(
+    'puzzle_solve_seconds', 'Wall time of a solve, from the cache or by search.',
+    (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120), ('source',)))
+SOLVE_NODES = registry.register(metrics.Histogram(
+    'puzzle_solve_nodes', 'Nodes expanded by a search.',
+    (10, 100, 1000, 10000, 100000, 1000000, 10000000, 100000000)))
+SOLVES_IN_FLIGHT = registry.register(metrics.Gauge(
+    'puzzle_solves_in_flight', 'Solves currently running.'))
+REJECTED = registry.register(metrics.Counter(
+    'puzzle_solves_rejected_total', 'Puzzles rejected before solving.', ('reason',)))
+UNSOLVED = registry.register(metrics.Counter(
+    'puzzle_solves_unsolved_total', 'Searches that ended without a solution.'))
+BUDGET_EXCEEDED = registry.register(metrics.Counter(
+    'puzzle_solves_budget_exceeded_total', 'Searches stopped by their time, node or memory budget.', ('reason',)))
+registry.register(metrics.Gauge(
+    'puzzle_solve_queue_depth', 'Solves waiting for a solver thread.', getter=lambda: solve_pool.queued()))
+registry.register(metrics.Gauge(
+    'puzzle_cache_hit_ratio', 'Share of cache lookups that hit.', getter=lambda: solution_cache.stats()['hit_rate']))
+registry.register(metrics.Counter(
+    'puzzle_cache_hits_total', 'Solution cache hits.', getter=lambda: solution_cache.hits))
+registry.register(metrics.Counter(
+    'puzzle_cache_misses_total', 'Solution cache misses.', getter=lambda: solution_cache.misses))
+registry.register(metrics.Gauge(
+    'puzzle_cache_entries', 'Boards in the solution cache.', getter=lambda: len(solution_cache.entries)))
+
+def record_rejected(error):
+    REJECTED.inc(reason='unsolvable' if error == UNSOLVABLE_ERROR else 'invalid')
+
+def record_budget_exceeded(reason, elapsed, nodes):
+    BUDGET_EXCEEDED.inc(reason=reason)
+    record_solve(elapsed, nodes, False, False)
+
+def record_solve(elapsed, nodes, cached, solved):
+    SOLVE_SECONDS.observe(elapsed, source='cache' if cached else 'search')
+    if not cached and nodes is not None:
+        SOLVE_NODES.observe(nodes)
+    if not solved:
+        UNSOLVED.inc()
+
+@app.after_request
+def count_request(response):
+    REQUESTS.inc(endpoint=request.endpoint or 'unknown', method=request.method, status=response.status_code)
+    return response
+
+# 'words' sends moves as ["right", "down", ...], 'compact' as "RD..."
+MOVE_FORMATS = ('words', 'compact')
+
+def check_format(move_format):
+    if move_format not in MOVE_FORMATS:
+        return f"Unknown format '{move_format}'. Choose from: {', '.join(MOVE_FORMATS)}."
+    return None
+
+def format_moves(moves, move_format):
+    return board.encode_moves(moves) if move_format == 'compact' else moves
+
+# Profiling: a request with "profile": true, or a random PUZZLE_PROFILE_RATE
+# share of all solves, is run under cProfile and the stats are dumped to
+# PUZZLE_PROFILE_DIR (load them with pstats or snakeviz). Off unless the
+# directory is set. One solve is profiled at a time; others run normally.
+PROFILE_DIR = os.environ.get('PUZZLE_PROFILE_DIR')
+PROFILE_RATE = float(os.environ.get('PUZZLE_PROFILE_RATE', '0'))
+profile_lock = threading.Lock()
+
+def should_profile(requested):
+    return PROFILE_DIR is not None and (requested or (PROFILE_RATE > 0 and random.random() < PROFILE_RATE))
+
+def profiled(func, *args, **kwargs):
+    # Returns (result, profile file name or None)
+    if not profile_lock.acquire(blocking=False):
+        return func(*args, **kwargs), None
+    try:
+        profiler = cProfile.Profile()
+        result = profiler.runcall(func, *args, **kwargs)
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        name = f'solve-{time.strftime("%Y%m%d-%H%M%S")}-{os.getpid()}-{threading.get_ident()}.prof'
+        profiler.dump_stats(os.path.join(PROFILE_DIR, name))
+        return result, name
+    finally:
+        profile_lock.release()
+
+# Solves run on a bounded pool of PUZZLE_SOLVE_WORKERS threads with up to
+# PUZZLE_SOLVE_QUEUE more waiting; past that, requests get 429. Every solve
+# has a budget of wall time, expanded nodes and memory growth: the server
+# limits below, which a request may lower with
+# "budget": {"seconds": ..., "nodes": ..., "memory": ...}. 0 turns a limit off.
+solve_pool = jobs.SolvePool(workers=int(os.environ.get('PUZZLE_SOLVE_WORKERS', '2')),
+                            queue_size=int(os.environ.get('PUZZLE_SOLVE_QUEUE', '8')))
+BUDGET_LIMITS = {
+    'seconds': float(os.environ.get('PUZZLE_MAX_SECONDS', '30')) or None,
+    'nodes': int(os.environ.get('PUZZLE_MAX_NODES', '0')) or None,
+    'memory': int(os.environ.get('PUZZLE_MAX_MEMORY', str(512 * 1024 * 1024))) or None
+}
+
+def parse_budget(requested, server_limits=BUDGET_LIMITS):
+    # Returns (limits, None), each limit the smaller of the server's and
+    # the request's, else (None, error)
+    limits = dict(server_limits)
+    if requested is None:
+        return limits, None
+    if not isinstance(requested, dict):
+        return None, "'budget' must be an object."
+    for key, value in requested.items():
+        if key not in limits:
+            return None, f"Unknown budget '{key}'. Choose from: {', '.join(limits)}."
+        # NaN would pass value <= 0 and then switch the limit off
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value) or value <= 0:
+            return None, f"Budget '{key}' must be a positive number."
+        limits[key] = value if limits[key] is None else min(value, limits[key])
+    return limits, None
+
+def solve_puzzle(puzzle, heuristic, mode='optimal', mode_options=None, **options):
+    # ida_star in any of modes.MODES; returns (moves, optimal)
+    if mode == 'optimal':
+        return ida_star(puzzle, heuristic, **options), True
+    return modes.solve(puzzle, mode, heuristic, max_iterations=50, **(mode_options or {}), **options)
+
+def solve_on_pool(puzzle, heuristic, stats, limits, profile=False, mode='optimal', mode_options=None, **options):
+    # Runs on a solve_pool thread and returns (moves, optimal, profile file
+    # name). The budget starts here, so time spent queued does not count.
+    SOLVES_IN_FLIGHT.inc()
+    try:
+        budget = search.Budget(**limits)
+        if mode == 'bidirectional' and limits['memory']:
+            # Fall back to IDA* well before the memory budget runs out
+            mode_options = {**(mode_options or {}), 'max_memory': limits['memory'] // 2}
+        if profile:
+            (solution, optimal), name = profiled(solve_puzzle, puzzle, heuristic, mode, mode_options, stats=stats,
+                                                 budget=budget, **options)
+            return solution, optimal, name
+        return *solve_puzzle(puzzle, heuristic, mode, mode_options, stats=stats, budget=budget, **options), None
+    finally:
+        SOLVES_IN_FLIGHT.dec()
+
+def parse_mode(data):
+    # Returns (mode, options for modes.solve, None), else (None, None, error).
+    # "mode" is one of modes.MODES; "weight" (weighted), "width" (beam and
+    # anytime) and "deadline" in seconds (anytime) tune it.
+    mode = data.get('mode', 'optimal')
+    if mode not in modes.MODES:
+        return None, None, f"Unknown mode '{mode}'. Choose from: {', '.join(modes.MODES)}."
+    options = {}
+    for key, low, high in (('weight', 1, 10), ('width', 1, 10000), ('deadline', 0.001, BUDGET_LIMITS['seconds'])):
+        if key in data:
+            value = data[key]
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or not low <= value <= (high or value):
+                return None, None, f"'{key}' must be a number from {low} to {high or 'any'}."
+            options[key] = int(value) if key == 'width' else value
+    return mode, options, None
+
+def busy_response():
+    REJECTED.inc(reason='busy')
+    response = jsonify({
+        'success': False,
+        'error': 'The server is busy solving other puzzles. Please try again shortly.'
+    })
+    response.status_code = 429
+    response.headers['Retry-After'] = '1'
+    return response
+
+def budget_error(e):
+    # Body for a search stopped by its budget: the best lower bound reached,
+    # if the search proves one
+    error = f'Search budget exhausted ({e.reason}).'
+    if e.bound is not None:
+        error += f' The shortest solution has at least {e.bound} moves.'
+    return {
+        'success': False,
+        'error': error,
+        'budget_exceeded': e.reason,
+        'lower_bound': e.bound,
+        'nodes': e.nodes
+    }
+
+def check_heuristic(heuristic):
+    if heuristic not in heuristics.HEURISTICS:
+        return f"Unknown heuristic '{heuristic}'. Choose from: {', '.join(sorted(heuristics.HEURISTICS))}."
+    return None
+
 @app.route('/api/solve', methods=['POST'])
 def api_solve():
     try:
         data = request.get_json()
         puzzle_text = data.get('puzzle', '')
-        
-        # Parse the puzzle input
-        lines = [line.strip() for line in puzzle_text.strip().split('\n') if line.strip()]
-        
-        if len(lines) != 4:
+        heuristic = data.get('heuristic', 'manhattan_linear_conflict')
+        move_format = data.get('format', 'words')
+        limits, error = parse_budget(data.get('budget'))
+        mode, mode_options, mode_error = parse_mode(data)
+        error = check_heuristic(heuristic) or check_format(move_format) or error or mode_error
+        if error:
             return jsonify({
                 'success': False,
-                'error': 'Puzzle must have exactly 4 rows.'
+                'error': error
             })
-        
-        puzzle = []
-        for line in lines:
-            row = list(map(int, line.split()))
-            if len(row) != 4:
-                return jsonify({
-                    'success': False,
-                    'error': 'Each row must have exactly 4 numbers.'
-                })
-            puzzle.append(row)
-        
-        # Validate puzzle (check if all numbers 0-15 are present)
-        flat = [num for row in puzzle for num in row]
-        if sorted(flat) != list(range(16)):
+
+        puzzle, error = parse_puzzle(puzzle_text, heuristic)
+        if error:
+            record_rejected(error)
             return jsonify({
                 'success': False,
-                'error': 'Puzzle must contain all numbers from 0 to 15 exactly once.'
+                'error': error
             })
-        
-        # Check if puzzle is solvable
-        inversions = 0
-        flat_no_zero = [x for x in flat if x != 0]
-        for i in range(len(flat_no_zero)):
-            for j in range(i + 1, len(flat_no_zero)):
-                if flat_no_zero[i] > flat_no_zero[j]:
-                    inversions += 1
-        
-        # Find row of empty space (from bottom)
-        empty_row = 0
-        for i in range(4):
-            if 0 in puzzle[i]:
-                empty_row = 4 - i
-                break
-        
-        # Puzzle is solvable if:
-        # - Grid width is odd and inversions is even
-        # - Grid width is even and (inversions + empty_row) is odd
-        is_solvable = (inversions + empty_row) % 2 == 1
-        
-        if not is_solvable:
+
+        # Solve the puzzle, unless this board (or its mirror) is cached;
+        # cached solutions are optimal, so they answer every mode. Only
+        # optimal solutions are cached.
+        # "stats": true adds generated nodes, heuristic calls, pruning and
+        # per-threshold counts to the response.
+        start_time = time.time()
+        solution = lookup_solution(puzzle)
+        cached = optimal = solution is not None
+        stats = search.SearchStats(detailed=bool(data.get('stats')))
+        profile = None
+        if not cached:
+            try:
+                future = solve_pool.submit(solve_on_pool, puzzle, heuristic, stats, limits,
+                                           should_profile(data.get('profile')), mode, mode_options)
+            except jobs.Saturated:
+                return busy_response()
+            try:
+                solution, optimal, profile = future.result()
+            except search.BudgetExceeded as e:
+                record_budget_exceeded(e.reason, time.time() - start_time, e.nodes)
+                return jsonify(budget_error(e))
+            if solution is not None and optimal:
+                remember_solution(puzzle, solution)
+        end_time = time.time()
+        record_solve(end_time - start_time, stats.nodes, cached, solution is not None)
+
+        if solution is None:
             return jsonify({
                 'success': False,
-                'error': 'This puzzle configuration is not solvable. Exactly half of all possible 15-puzzle configurations are unsolvable.'
+                'error': 'No solution found within reasonable time. The puzzle may be too complex.'
             })
-        
-        # Solve the puzzle
+
+        result = {
+            'success': True,
+            'moves': format_moves(solution, move_format),
+            'puzzle': puzzle,
+            'heuristic': heuristic,
+            'mode': mode,
+            'optimal': optimal,
+            'time': end_time - start_time,
+            'nodes': stats.nodes,
+            'stats': stats.to_dict(),
+            'cached': cached
+        }
+        if profile:
+            result['profile'] = profile
+        return jsonify(result)
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'An error occurred: {str(e)}'
+        })
+
+# Seconds between keep-alive comments on an idle progress stream
+STREAM_KEEPALIVE = 15
+
+def sse_event(event, data):
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+@app.route('/api/solve/stream', methods=['GET'])
+def api_solve_stream():
+    # Server-Sent Events: one 'progress' event per IDA* iteration, then a
+    # 'result' event with the same body /api/solve returns. Closing the
+    # stream stops the search.
+    puzzle_text = request.args.get('puzzle', '')
+    heuristic = request.args.get('heuristic', 'manhattan_linear_conflict')
+    move_format = request.args.get('format', 'words')
+    error = check_heuristic(heuristic) or check_format(move_format)
+    limits = None
+    if not error:
+        # Budgets as ?seconds=&nodes=&memory=
+        try:
+            budget = {key: float(request.args[key]) for key in BUDGET_LIMITS if request.args.get(key)}
+            if not all(math.isfinite(value) for value in budget.values()):
+                raise ValueError()
+            limits, error = parse_budget(budget or None)
+        except ValueError:
+            error = 'Budget values must be finite numbers.'
+    puzzle = None
+    if not error:
+        puzzle, error = parse_puzzle(puzzle_text, heuristic)
+        if error:
+            record_rejected(error)
+    if error:
+        return Response(sse_event('result', {'success': False, 'error': error}), mimetype='text/event-stream')
+
+    events = queue.Queue()
+    closed = threading.Event()
+    start_time = time.time()
+
+    def on_iteration(threshold, nodes):
+        elapsed = time.time() - start_time
+        events.put(('progress', {
+            'threshold': threshold,
+            'nodes': nodes,
+            'elapsed': elapsed,
+            'nodes_per_second': nodes / elapsed if elapsed > 0 else 0
+        }))
+
+    def check():
+        if closed.is_set():
+            raise search.SearchCancelled()
+
+    def run():
+        try:
+            stats = search.SearchStats()
+            solution = lookup_solution(puzzle)
+            cached = solution is not None
+            if not cached:
+                solution, _, _ = solve_on_pool(puzzle, heuristic, stats, limits, on_iteration=on_iteration,
+                                               check=check)
+                if solution is not None:
+                    remember_solution(puzzle, solution)
+            end_time = time.time()
+            record_solve(end_time - start_time, stats.nodes, cached, solution is not None)
+            if solution is None:
+                result = {
+                    'success': False,
+                    'error': 'No solution found within reasonable time. The puzzle may be too complex.'
+                }
+            else:
+                result = {
+                    'success': True,
+                    'moves': format_moves(solution, move_format),
+                    'puzzle': puzzle,
+                    'heuristic': heuristic,
+                    'time': end_time - start_time,
+                    'nodes': stats.nodes,
+                    'cached': cached
+                }
+        except search.BudgetExceeded as e:
+            record_budget_exceeded(e.reason, time.time() - start_time, e.nodes)
+            result = budget_error(e)
+        except search.SearchCancelled:
+            return
+        except Exception as e:
+            result = {'success': False, 'error': f'An error occurred: {str(e)}'}
+        events.put(('result', result))
+
+    try:
+        solve_pool.submit(run)
+    except jobs.Saturated:
+        REJECTED.inc(reason='busy')
+        return Response(sse_event('result', {
+            'success': False,
+            'error': 'The server is busy solving other puzzles. Please try again shortly.'
+        }), status=429, mimetype='text/event-stream', headers={'Retry-After': '1'})
+
+    def generate():
+        try:
+            while True:
+                try:
+                    event, data = events.get(timeout=STREAM_KEEPALIVE)
+                except queue.Empty:
+                    yield ': keep-alive\n\n'
+                    continue
+                yield sse_event(event, data)
+                if event == 'result':
+                    return
+        finally:
+            closed.set()
+
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# Batch solving runs on a process pool shared by all requests. At most
+# PUZZLE_BATCH_REQUESTS batches run at once, more get 429, and each keeps
+# only a couple of puzzles per process in the pool's queue.
+MAX_BATCH_SIZE = int(os.environ.get('PUZZLE_MAX_BATCH', '10000'))
+BATCH_WORKERS = int(os.environ.get('PUZZLE_WORKERS', '0')) or os.cpu_count() or 1
+batch_slots = threading.BoundedSemaphore(int(os.environ.get('PUZZLE_BATCH_REQUESTS', '2')))
+_batch_pool = None
+_batch_pool_lock = threading.Lock()
+
+def get_batch_pool():
+    global _batch_pool
+    with _batch_pool_lock:
+        if _batch_pool is None:
+            _batch_pool = ProcessPoolExecutor(max_workers=BATCH_WORKERS)
+        return _batch_pool
+
+def drop_batch_pool(pool):
+    # A pool whose worker died (OOM kill, crash) fails every later submit;
+    # the next get_batch_pool() starts a new one
+    global _batch_pool
+    with _batch_pool_lock:
+        if _batch_pool is pool:
+            _batch_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def solve_batch_item(puzzle, heuristic, limits=None):
+    # Runs in a pool worker; errors become per-item results
+    try:
+        stats = search.SearchStats()
         start_time = time.time()
-        solution = ida_star(puzzle)
+        solution = ida_star(puzzle, heuristic, stats, budget=search.Budget(**limits) if limits else None)
         end_time = time.time()
-        
-        if solution is None:
+    except search.BudgetExceeded as e:
+        return {**budget_error(e), 'time': time.time() - start_time}
+    except Exception as e:
+        return {'success': False, 'error': f'An error occurred: {str(e)}'}
+    if solution is None:
+        return {'success': False, 'error': 'No solution found within reasonable time. The puzzle may be too complex.'}
+    return {
+        'success': True,
+        'moves': solution,
+        'time': end_time - start_time,
+        'nodes': stats.nodes,
+        'cached': False
+    }
+
+@app.route('/api/solve/batch', methods=['POST'])
+def api_solve_batch():
+    try:
+        data = request.get_json()
+        puzzles = data.get('puzzles')
+        if not isinstance(puzzles, list):
             return jsonify({
                 'success': False,
-                'error': 'No solution found within reasonable time. The puzzle may be too complex.'
+                'error': "Request must contain a 'puzzles' array."
+            })
+        if len(puzzles) > MAX_BATCH_SIZE:
+            return jsonify({
+                'success': False,
+                'error': f'A batch may contain at most {MAX_BATCH_SIZE} puzzles.'
+            })
+        heuristic = data.get('heuristic', 'manhattan_linear_conflict')
+        move_format = data.get('format', 'words')
+        limits, error = parse_budget(data.get('budget'))
+        error = check_heuristic(heuristic) or check_format(move_format) or error
+        if error:
+            return jsonify({
+                'success': False,
+                'error': error
             })
-        
+
+        if not batch_slots.acquire(blocking=False):
+            return busy_response()
+        start_time = time.time()
+        results = [None] * len(puzzles)
+        futures = {}
+        pool = get_batch_pool()
+
+        def collect(done):
+            for future in done:
+                index, puzzle = futures.pop(future)
+                SOLVES_IN_FLIGHT.dec()
+                results[index] = result = future.result()
+                if result['success']:
+                    record_solve(result['time'], result['nodes'], False, True)
+                    remember_solution(puzzle, result['moves'])
+                elif 'budget_exceeded' in result:
+                    record_budget_exceeded(result['budget_exceeded'], result['time'], result['nodes'])
+                else:
+                    UNSOLVED.inc()
+
+        try:
+            for index, puzzle_text in enumerate(puzzles):
+                puzzle, error = parse_puzzle(puzzle_text, heuristic)
+                if error:
+                    record_rejected(error)
+                    results[index] = {'success': False, 'error': error}
+                    continue
+                moves = lookup_solution(puzzle)
+                if moves is not None:
+                    results[index] = {'success': True, 'moves': moves, 'time': 0.0, 'nodes': 0, 'cached': True}
+                    record_solve(0.0, 0, True, True)
+                    continue
+                futures[pool.submit(solve_batch_item, puzzle, heuristic, limits)] = (index, puzzle)
+                SOLVES_IN_FLIGHT.inc()
+                if len(futures) >= 2 * BATCH_WORKERS:
+                    collect(wait(futures, return_when=FIRST_COMPLETED).done)
+            collect(list(futures))
+        except BrokenProcessPool:
+            drop_batch_pool(pool)
+            return jsonify({
+                'success': False,
+                'error': 'A batch worker stopped unexpectedly. Please try again.'
+            })
+        finally:
+            SOLVES_IN_FLIGHT.dec(len(futures))
+            batch_slots.release()
+        if move_format != 'words':
+            for result in results:
+                if result['success']:
+                    result['moves'] = format_moves(result['moves'], move_format)
+        end_time = time.time()
+
         return jsonify({
             'success': True,
-            'moves': solution,
-            'puzzle': puzzle,
+            'results': results,
+            'heuristic': heuristic,
             'time': end_time - start_time
         })
-        
-    except ValueError:
+
+    except Exception as e:
         return jsonify({
             'success': False,
-            'error': 'Invalid input format. Please enter numbers only.'
+            'error': f'An error occurred: {str(e)}'
         })
+
+@app.route('/metrics', methods=['GET'])
+def api_metrics():
+    return Response(registry.render(), content_type=metrics.CONTENT_TYPE)
+
+@app.route('/api/cache', methods=['GET'])
+def api_cache():
+    return jsonify({'success': True, **solution_cache.stats()})
+
+# Background solve jobs, for puzzles that take too long for one request.
+# PUZZLE_JOB_WORKERS run at once with up to PUZZLE_JOB_QUEUE more waiting;
+# past that, new jobs get 429. A job's budget is that of a solve, except
+# for its PUZZLE_JOB_MAX_SECONDS of wall time.
+job_manager = jobs.JobManager(workers=int(os.environ.get('PUZZLE_JOB_WORKERS', '2')),
+                              queue_size=int(os.environ.get('PUZZLE_JOB_QUEUE', '16')))
+JOB_BUDGET_LIMITS = {**BUDGET_LIMITS, 'seconds': float(os.environ.get('PUZZLE_JOB_MAX_SECONDS', '600')) or None}
+
+@app.route('/api/jobs', methods=['POST'])
+def api_create_job():
+    try:
+        data = request.get_json()
+        heuristic = data.get('heuristic', 'manhattan_linear_conflict')
+        limits, error = parse_budget(data.get('budget'), JOB_BUDGET_LIMITS)
+        error = check_heuristic(heuristic) or error
+        if error:
+            return jsonify({
+                'success': False,
+                'error': error
+            })
+
+        puzzle, error = parse_puzzle(data.get('puzzle', ''), heuristic)
+        if error:
+            record_rejected(error)
+            return jsonify({
+                'success': False,
+                'error': error
+            })
+
+        try:
+            job = job_manager.submit(puzzle, limits, heuristic=heuristic)
+        except jobs.Saturated:
+            return busy_response()
+        return jsonify({'success': True, **job.to_dict()}), 202
+
     except Exception as e:
         return jsonify({
             'success': False,
             'error': f'An error occurred: {str(e)}'
         })
 
+def job_response(job):
+    # ?format=compact on the job routes, as on /api/solve
+    data = job.to_dict()
+    move_format = request.args.get('format', 'words')
+    if 'moves' in data and move_format in MOVE_FORMATS:
+        data['moves'] = format_moves(data['moves'], move_format)
+    return data
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def api_get_job(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'error': 'Unknown job.'
+        }), 404
+    return jsonify({'success': True, **job_response(job)})
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def api_cancel_job(job_id):
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'error': 'Unknown job.'
+        }), 404
+    return jsonify({'success': True, **job_response(job)})
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,206 @@
+# grid.py (packed boards of any size, see board.py)
+#
+# The same packing as board.py for rows x cols boards: cell i = row * cols
+# + col lives in BITS bits starting at bit BITS * i, where BITS is the
+# fewest bits that hold the largest tile, but at least 4. A 3x3 board fits
+# in 36 bits, a 5x5 one in 125; Python integers grow as needed.
+#
+# A Grid has the same names as the board module (NEIGHBORS, GOAL_STATE,
+# pack, slide, ...), so code written against one works with the other.
+# geometry() hands out the board module itself for 4x4 boards, which keeps
+# them on the specialized tables and heuristics.
+import board
+import heuristics
+
+MIN_SIDE = 2
+MAX_SIDE = 6
+
+
+class Grid:
+    MOVES = board.MOVES
+    MOVE_INDEX = board.MOVE_INDEX
+    OPPOSITE = board.OPPOSITE
+
+    def __init__(self, rows, cols):
+        self.ROWS = rows
+        self.COLS = cols
+        self.CELLS = rows * cols
+        self.BITS = max(4, (self.CELLS - 1).bit_length())
+        self.MASK = (1 << self.BITS) - 1
+        # SHIFTS[cell] -> lowest bit of the cell
+        self.SHIFTS = tuple(cell * self.BITS for cell in range(self.CELLS))
+        self.goal = [[(r * cols + c + 1) % self.CELLS for c in range(cols)] for r in range(rows)]
+        self.NEIGHBORS = tuple(self._neighbors(blank) for blank in range(self.CELLS))
+        self.TARGET = tuple(
+            tuple(dict(self.NEIGHBORS[blank]).get(move, -1) for move in range(len(self.MOVES)))
+            for blank in range(self.CELLS)
+        )
+        self.GOAL_STATE, self.GOAL_BLANK = self.pack(self.goal)
+
+    def _neighbors(self, blank):
+        x, y = divmod(blank, self.COLS)
+        result = []
+        for move, (dx, dy) in enumerate(board._DELTAS):
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < self.ROWS and 0 <= ny < self.COLS:
+                result.append((move, nx * self.COLS + ny))
+        return tuple(result)
+
+    def pack(self, puzzle):
+        state = 0
+        blank = -1
+        for i, val in enumerate(val for row in puzzle for val in row):
+            state |= val << self.SHIFTS[i]
+            if val == 0:
+                blank = i
+        return state, blank
+
+    def unpack(self, state):
+        return [[self.tile_at(state, r * self.COLS + c) for c in range(self.COLS)] for r in range(self.ROWS)]
+
+    def tile_at(self, state, cell):
+        return (state >> self.SHIFTS[cell]) & self.MASK
+
+    def slide(self, state, blank, target):
+        tile = (state >> self.SHIFTS[target]) & self.MASK
+        return state ^ (tile << self.SHIFTS[target]) ^ (tile << self.SHIFTS[blank])
+
+    def apply_moves(self, state, blank, moves):
+        for move in moves:
+            target = self.TARGET[blank][self.MOVE_INDEX[move]]
+            if target < 0:
+                raise ValueError(f"Illegal move '{move}' from cell {blank}")
+            state = self.slide(state, blank, target)
+            blank = target
+        return state, blank
+
+
+_grids = {}
+
+
+def get_grid(rows, cols):
+    if not (MIN_SIDE <= rows <= MAX_SIDE and MIN_SIDE <= cols <= MAX_SIDE):
+        raise ValueError(f'Boards must have {MIN_SIDE} to {MAX_SIDE} rows and columns, not {rows}x{cols}.')
+    if (rows, cols) not in _grids:
+        _grids[rows, cols] = Grid(rows, cols)
+    return _grids[rows, cols]
+
+
+def geometry(puzzle):
+    # The board module for 4x4 puzzles, else the Grid of the puzzle's size
+    rows, cols = len(puzzle), len(puzzle[0])
+    if rows == board.SIZE and cols == board.SIZE:
+        return board
+    return get_grid(rows, cols)
+
+
+def is_solvable(puzzle):
+    # With an odd number of columns a move never changes the parity of the
+    # inversions; with an even number a vertical move also moves the blank
+    # one row, so inversions plus the blank's row from the bottom keep
+    # their parity. The goal has none and the blank on row 1.
+    flat = [val for row in puzzle for val in row if val != 0]
+    inversions = sum(1 for i in range(len(flat)) for j in range(i + 1, len(flat)) if flat[i] > flat[j])
+    if len(puzzle[0]) % 2 == 1:
+        return inversions % 2 == 0
+    blank_row = next(len(puzzle) - i for i, row in enumerate(puzzle) if 0 in row)
+    return (inversions + blank_row) % 2 == 1
+
+
+UNSOLVABLE_ERROR = ('This puzzle configuration is not solvable. Exactly half of all possible configurations of '
+                    'a sliding puzzle are unsolvable.')
+
+
+def check_puzzle(puzzle):
+    # None for a solvable board of rows of ints, else what is wrong with it
+    if not MIN_SIDE <= len(puzzle) <= MAX_SIDE:
+        return f'Puzzle must have {MIN_SIDE} to {MAX_SIDE} rows.'
+    if any(len(row) != len(puzzle[0]) for row in puzzle):
+        return 'Every row must have the same number of numbers.'
+    if not MIN_SIDE <= len(puzzle[0]) <= MAX_SIDE:
+        return f'Each row must have {MIN_SIDE} to {MAX_SIDE} numbers.'
+    cells = len(puzzle) * len(puzzle[0])
+    if sorted(val for row in puzzle for val in row) != list(range(cells)):
+        return f'Puzzle must contain all numbers from 0 to {cells - 1} exactly once.'
+    if not is_solvable(puzzle):
+        return UNSOLVABLE_ERROR
+    return None
+
+
+class ManhattanLinearConflict:
+    # heuristics.ManhattanLinearConflict for a Grid or the board module,
+    # towards its goal or any other target board. Lines are keyed by their
+    # packed contents like there; column keys are gathered one cell at a
+    # time.
+    name = heuristics.ManhattanLinearConflict.name
+
+    def __init__(self, grid, target_state=None):
+        self.grid = grid
+        cells, cols = grid.CELLS, grid.COLS
+        if target_state is None:
+            target_state = grid.GOAL_STATE
+        cell_of = [0] * cells
+        for cell in range(cells):
+            cell_of[grid.tile_at(target_state, cell)] = cell
+        self.target_row = [cell_of[val] // cols for val in range(cells)]
+        self.target_col = [cell_of[val] % cols for val in range(cells)]
+        self.distance = [
+            [0] * cells if val == 0 else
+            [abs(cell // cols - self.target_row[val]) + abs(cell % cols - self.target_col[val])
+             for cell in range(cells)]
+            for val in range(cells)
+        ]
+        self.row_bits = cols * grid.BITS
+        self.row_mask = (1 << self.row_bits) - 1
+        self.rows = [{} for _ in range(grid.ROWS)]
+        self.columns = [{} for _ in range(cols)]
+
+    def row_conflict(self, state, r):
+        key = (state >> (r * self.row_bits)) & self.row_mask
+        value = self.rows[r].get(key)
+        if value is None:
+            value = self.rows[r][key] = heuristics.line_conflict(
+                key, self.target_row, self.target_col, r, self.grid.COLS, self.grid.BITS)
+        return value
+
+    def column_conflict(self, state, c):
+        grid = self.grid
+        key = 0
+        for r in range(grid.ROWS):
+            key |= grid.tile_at(state, r * grid.COLS + c) << (r * grid.BITS)
+        value = self.columns[c].get(key)
+        if value is None:
+            value = self.columns[c][key] = heuristics.line_conflict(
+                key, self.target_col, self.target_row, c, grid.ROWS, grid.BITS)
+        return value
+
+    def reset(self, state, blank):
+        grid = self.grid
+        h = sum(self.distance[grid.tile_at(state, cell)][cell] for cell in range(grid.CELLS))
+        h += sum(self.row_conflict(state, r) for r in range(grid.ROWS))
+        return h + sum(self.column_conflict(state, c) for c in range(grid.COLS))
+
+    def step(self, h, state, child, tile, frm, to):
+        cols = self.grid.COLS
+        h += self.distance[tile][to] - self.distance[tile][frm]
+        if frm % cols == to % cols:
+            a, b = frm // cols, to // cols
+            return (h + self.row_conflict(child, a) + self.row_conflict(child, b)
+                    - self.row_conflict(state, a) - self.row_conflict(state, b))
+        a, b = frm % cols, to % cols
+        return (h + self.column_conflict(child, a) + self.column_conflict(child, b)
+                - self.column_conflict(state, a) - self.column_conflict(state, b))
+
+    def unstep(self, tile, frm, to):
+        pass
+
+
+def get_heuristic(geo, name, weight=1):
+    # heuristics.get_heuristic for a geometry(). The pattern database and
+    # walking distance tables only exist for 4x4 boards.
+    if geo is board or name not in heuristics.HEURISTICS:
+        return heuristics.get_heuristic(name, weight)
+    if name != ManhattanLinearConflict.name:
+        raise ValueError(f"Heuristic '{name}' only works on 4x4 boards. Use '{ManhattanLinearConflict.name}'.")
+    heuristic = ManhattanLinearConflict(geo)
+    return heuristic if weight == 1 else heuristics.Weighted(heuristic, weight)
@@ -0,0 +1,234 @@
+# gui.py (pygame window for solve.py)
+#
+# Shows the board while a BackgroundSolve (see solve.py) searches, then
+# plays the solution back. Only imported once a window is wanted, so the
+# solver and batch mode start without pygame.
+import os
+
+import pygame
+
+import jobs
+from board import MOVE_NAMES, apply_move, find_blank
+
+os.environ['SDL_VIDEO_WINDOW_POS'] = "100,100"
+
+def solver_status(solver, playback):
+    # One line above the board: search progress, then playback position
+    if solver.status == jobs.RUNNING:
+        threshold = "-" if solver.threshold is None else solver.threshold
+        return (f"Solving... threshold {threshold} · {solver.nodes():,} nodes · {solver.elapsed():.1f}s"
+                f" · C to cancel")
+    if solver.status == jobs.CANCELLED:
+        return "Search cancelled · ESC to exit"
+    if solver.status == jobs.FAILED:
+        return "No solution found · ESC to exit"
+    total = len(solver.solution)
+    speed = f"{playback.moves_per_second()} moves/s"
+    if playback.index == total:
+        return f"Solved in {total} moves · ← to step back · ESC to exit"
+    if playback.auto:
+        return f"Move {playback.index}/{total} · playing at {speed} · A to pause, +/- for speed"
+    return f"Move {playback.index}/{total} · SPACE/→ next, ← back, A to play at {speed}, +/- for speed"
+
+CELL_SIZE = 100
+TILE_MARGIN = 5
+BACKGROUND = (255, 255, 255)
+TILE_COLOR = (100, 149, 237)
+
+class BoardView:
+    # Where a board sits on the screen, plus every tile rendered once up
+    # front. Each draw method returns the rectangles it changed, for
+    # pygame.display.update, so a move costs two blits of cached surfaces.
+    def __init__(self, screen, rows, cols, font, status_font):
+        self.screen = screen
+        self.rows = rows
+        self.cols = cols
+        self.status_font = status_font
+        screen_width, screen_height = screen.get_size()
+        self.offset_x = (screen_width - cols * CELL_SIZE) // 2
+        self.offset_y = (screen_height - rows * CELL_SIZE) // 2
+        self.status_rect = pygame.Rect(0, self.offset_y - 60, screen_width, 50)
+        size = CELL_SIZE - 2 * TILE_MARGIN
+        self.tiles = {}
+        for val in range(1, rows * cols):
+            tile = pygame.Surface((size, size))
+            tile.fill(TILE_COLOR)
+            text = font.render(str(val), True, (255, 255, 255))
+            tile.blit(text, text.get_rect(center=(size // 2, size // 2)))
+            self.tiles[val] = tile.convert()
+
+    def cell_rect(self, i, j):
+        return pygame.Rect(self.offset_x + j * CELL_SIZE, self.offset_y + i * CELL_SIZE, CELL_SIZE, CELL_SIZE)
+
+    def draw(self, board):
+        self.screen.fill(BACKGROUND)
+        for i in range(self.rows):
+            for j in range(self.cols):
+                self.draw_cell(board, i, j)
+        return [self.screen.get_rect()]
+
+    def draw_cell(self, board, i, j):
+        rect = self.cell_rect(i, j)
+        self.screen.fill(BACKGROUND, rect)
+        if board[i][j] != 0:
+            self.screen.blit(self.tiles[board[i][j]], rect.move(TILE_MARGIN, TILE_MARGIN))
+        return rect
+
+    def draw_slide(self, val, frm, to, progress):
+        # Tile val part of the way from cell frm to cell to
+        start, end = self.cell_rect(*frm), self.cell_rect(*to)
+        self.screen.fill(BACKGROUND, start)
+        self.screen.fill(BACKGROUND, end)
+        x = start.x + (end.x - start.x) * progress
+        y = start.y + (end.y - start.y) * progress
+        self.screen.blit(self.tiles[val], (round(x) + TILE_MARGIN, round(y) + TILE_MARGIN))
+        return start.union(end)
+
+    def draw_status(self, text):
+        self.screen.fill(BACKGROUND, self.status_rect)
+        rendered = self.status_font.render(text, True, (60, 60, 60))
+        self.screen.blit(rendered, rendered.get_rect(center=self.status_rect.center))
+        return self.status_rect
+
+def draw_board(screen, board, font):
+    # Full redraw, for one-off use; run_gui keeps a BoardView instead
+    BoardView(screen, len(board), len(board[0]), font, font).draw(board)
+
+REVERSE = {'up': 'down', 'down': 'up', 'left': 'right', 'right': 'left'}
+# Playback speeds in moves per second; a slide takes one move's time
+SPEEDS = (1, 2, 4, 8, 16, 32)
+DEFAULT_SPEED = 2
+# Playback advances in fixed steps of this many seconds, whatever the frame
+# rate, so a slide takes the same time on any display
+TIMESTEP = 1 / 120
+
+class Playback:
+    # Steps through a solution in both directions on a BoardView. Each step
+    # goes through apply_move at once and the moved tile then slides
+    # between its two cells, so a frame redraws those two cells only.
+    def __init__(self, view, board):
+        self.view = view
+        self.board = board
+        self.solution = None
+        self.index = 0
+        self.speed = SPEEDS.index(DEFAULT_SPEED)
+        self.auto = False
+        # [tile, cell it slides from, cell it slides to, progress 0..1]
+        self.slide = None
+        self.dirty = []
+
+    def moves_per_second(self):
+        return SPEEDS[self.speed]
+
+    def change_speed(self, delta):
+        self.speed = min(max(self.speed + delta, 0), len(SPEEDS) - 1)
+
+    def step(self, forward=True):
+        # Starts the next (or previous) move; False at either end
+        self.finish()
+        if self.solution is None or self.index == (len(self.solution) if forward else 0):
+            return False
+        if forward:
+            move = MOVE_NAMES.get(self.solution[self.index], self.solution[self.index])
+            self.index += 1
+            print(f"Move {self.index}/{len(self.solution)}: {move}")
+            if self.index == len(self.solution):
+                print("🎉 Puzzle solved! Press ESC to exit.")
+        else:
+            self.index -= 1
+            move = REVERSE[MOVE_NAMES.get(self.solution[self.index], self.solution[self.index])]
+            print(f"Back to move {self.index}/{len(self.solution)}")
+        before = find_blank(self.board)
+        apply_move(self.board, move)
+        after = find_blank(self.board)
+        # The tile now in the blank's old cell came from its new one
+        self.slide = [self.board[before[0]][before[1]], after, before, 0.0]
+        return True
+
+    def finish(self):
+        # Puts a sliding tile in its cell
+        if self.slide is not None:
+            _, frm, to, _ = self.slide
+            self.dirty += [self.view.draw_cell(self.board, *frm), self.view.draw_cell(self.board, *to)]
+            self.slide = None
+
+    def busy(self):
+        return self.slide is not None or self.auto
+
+    def update(self, dt):
+        if self.slide is not None:
+            self.slide[3] += dt * self.moves_per_second()
+            if self.slide[3] >= 1:
+                self.finish()
+        if self.slide is None and self.auto and not self.step():
+            self.auto = False
+
+    def draw(self):
+        # Rectangles changed since the last call
+        if self.slide is not None:
+            self.dirty.append(self.view.draw_slide(*self.slide))
+        dirty, self.dirty = self.dirty, []
+        return dirty
+
+# The loop wakes at most this often, which also leaves the interpreter to
+# the solver thread between frames; frames with nothing new draw nothing.
+# Slides are drawn at ANIMATION_FPS.
+FPS = 30
+ANIMATION_FPS = 60
+
+def run_gui(start_board, solver):
+    # Opens at once with the start board and the search progress; the
+    # solution can be played as soon as solver has it
+    pygame.init()
+    screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+    pygame.display.set_caption(f"{len(start_board) * len(start_board[0]) - 1} Puzzle Solver")
+    view = BoardView(screen, len(start_board), len(start_board[0]), pygame.font.SysFont(None, 72),
+                     pygame.font.SysFont(None, 36))
+    clock = pygame.time.Clock()
+    playback = Playback(view, [row[:] for row in start_board])
+    dirty = view.draw(playback.board)
+    status = None
+    elapsed = 0.0
+    print("\n✅ GUI loaded. Press C to cancel the search, SPACE or → to step through the solution, ← to step "
+          "back, A to auto-play, +/- to change speed, ESC to exit.")
+
+    running = True
+    while running:
+        if playback.solution is None and solver.status == jobs.DONE:
+            playback.solution = solver.solution
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    running = False
+                elif event.key == pygame.K_c and solver.status == jobs.RUNNING:
+                    solver.cancel()
+                elif event.key in (pygame.K_SPACE, pygame.K_RIGHT):
+                    playback.auto = False
+                    playback.step()
+                elif event.key in (pygame.K_LEFT, pygame.K_BACKSPACE):
+                    playback.auto = False
+                    playback.step(forward=False)
+                elif event.key in (pygame.K_a, pygame.K_RETURN) and playback.solution is not None:
+                    playback.auto = not playback.auto
+                elif event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS, pygame.K_UP):
+                    playback.change_speed(1)
+                elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS, pygame.K_DOWN):
+                    playback.change_speed(-1)
+        # Fixed timestep: whole steps of TIMESTEP, the rest carried over
+        while elapsed >= TIMESTEP:
+            playback.update(TIMESTEP)
+            elapsed -= TIMESTEP
+        dirty += playback.draw()
+        text = solver_status(solver, playback)
+        if text != status:
+            dirty.append(view.draw_status(text))
+            status = text
+        if dirty:
+            pygame.display.update(dirty)
+            dirty = []
+        # A stall (window dragged, machine busy) skips ahead at most 0.25s
+        elapsed = min(elapsed + clock.tick(ANIMATION_FPS if playback.busy() else FPS) / 1000, 0.25)
+    solver.cancel()
+    pygame.quit()
@@ -0,0 +1,147 @@
+# heuristics.py (lower bounds on packed boards, see board.py)
+#
+# A heuristic is a small object that the search creates once per solve:
+#   reset(state, blank)                -> h of the start board
+#   step(h, state, child, tile, frm, to) -> h of child, where child is state
+#                                         with tile slid from cell frm to to
+#   unstep(tile, frm, to)              -> undo any bookkeeping done by step
+# so the search can carry h along the path instead of rescanning the board.
+from board import SIZE, CELLS
+from pattern_db import AdditivePatternDatabase
+from walking_distance import WalkingDistance
+
+# GOAL_ROW[val], GOAL_COL[val] -> where tile val belongs
+GOAL_ROW = [0] * CELLS
+GOAL_COL = [0] * CELLS
+for _val in range(1, CELLS):
+    GOAL_ROW[_val], GOAL_COL[_val] = divmod(_val - 1, SIZE)
+
+# MANHATTAN[val][cell] -> distance of tile val at cell from its goal cell
+MANHATTAN = [
+    [0] * CELLS if val == 0 else
+    [abs(GOAL_ROW[val] - cell // SIZE) + abs(GOAL_COL[val] - cell % SIZE) for cell in range(CELLS)]
+    for val in range(CELLS)
+]
+
+_COLUMN_MASK = 0x000F000F000F000F
+
+
+def column_key(state, c):
+    # Gather the nibbles at bits 0, 16, 32, 48 into one 16-bit key
+    x = (state >> (c << 2)) & _COLUMN_MASK
+    return (x | (x >> 12) | (x >> 24) | (x >> 36)) & 0xFFFF
+
+
+def line_conflict(key, goal_line, goal_index, line, length=SIZE, bits=4):
+    # 2 extra moves for every tile that has to leave the line so the
+    # remaining tiles that belong to it are in goal order (longest
+    # increasing subsequence of their goal positions). key holds the
+    # line's length tiles, bits bits each.
+    order = []
+    mask = (1 << bits) - 1
+    for k in range(length):
+        val = (key >> (k * bits)) & mask
+        if val != 0 and goal_line[val] == line:
+            order.append(goal_index[val])
+    if len(order) < 2:
+        return 0
+    best = [1] * len(order)
+    for i in range(1, len(order)):
+        for j in range(i):
+            if order[j] < order[i] and best[j] + 1 > best[i]:
+                best[i] = best[j] + 1
+    return 2 * (len(order) - max(best))
+
+
+# Filled lazily: only line contents that actually occur get computed
+_ROW_CONFLICT = [{} for _ in range(SIZE)]
+_COLUMN_CONFLICT = [{} for _ in range(SIZE)]
+
+
+def row_conflict(state, r):
+    key = (state >> (r << 4)) & 0xFFFF
+    table = _ROW_CONFLICT[r]
+    value = table.get(key)
+    if value is None:
+        value = table[key] = line_conflict(key, GOAL_ROW, GOAL_COL, r)
+    return value
+
+
+def column_conflict(state, c):
+    key = column_key(state, c)
+    table = _COLUMN_CONFLICT[c]
+    value = table.get(key)
+    if value is None:
+        value = table[key] = line_conflict(key, GOAL_COL, GOAL_ROW, c)
+    return value
+
+
+def manhattan_linear_conflict(state):
+    dist = 0
+    for cell in range(CELLS):
+        dist += MANHATTAN[(state >> (cell << 2)) & 15][cell]
+    for line in range(SIZE):
+        dist += row_conflict(state, line) + column_conflict(state, line)
+    return dist
+
+
+class ManhattanLinearConflict:
+    name = 'manhattan_linear_conflict'
+
+    def reset(self, state, blank):
+        return manhattan_linear_conflict(state)
+
+    def step(self, h, state, child, tile, frm, to):
+        h += MANHATTAN[tile][to] - MANHATTAN[tile][frm]
+        # A vertical slide only changes the contents of two rows, a
+        # horizontal one only two columns; the tile order in the other
+        # direction is unchanged because the blank is not a tile.
+        if frm % SIZE == to % SIZE:
+            a, b = frm // SIZE, to // SIZE
+            return (h + row_conflict(child, a) + row_conflict(child, b)
+                    - row_conflict(state, a) - row_conflict(state, b))
+        a, b = frm % SIZE, to % SIZE
+        return (h + column_conflict(child, a) + column_conflict(child, b)
+                - column_conflict(state, a) - column_conflict(state, b))
+
+    def unstep(self, tile, frm, to):
+        pass
+
+
+class Weighted:
+    # weight * h of another heuristic, for weighted IDA*. Solutions are at
+    # most weight times longer than optimal. The raw h of every node on the
+    # path is kept on a stack, since step() is handed the weighted value.
+    def __init__(self, heuristic, weight):
+        self.heuristic = heuristic
+        self.weight = weight
+        self.name = f'{heuristic.name}*{weight:g}'
+        self.raw = []
+
+    def reset(self, state, blank):
+        self.raw = [self.heuristic.reset(state, blank)]
+        return self.weight * self.raw[0]
+
+    def step(self, h, state, child, tile, frm, to):
+        raw = self.heuristic.step(self.raw[-1], state, child, tile, frm, to)
+        self.raw.append(raw)
+        return self.weight * raw
+
+    def unstep(self, tile, frm, to):
+        self.raw.pop()
+        self.heuristic.unstep(tile, frm, to)
+
+
+HEURISTICS = {
+    ManhattanLinearConflict.name: ManhattanLinearConflict,
+    AdditivePatternDatabase.name: AdditivePatternDatabase,
+    WalkingDistance.name: WalkingDistance,
+}
+
+
+def get_heuristic(name, weight=1):
+    try:
+        heuristic = HEURISTICS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown heuristic '{name}'. Choose from: {', '.join(sorted(HEURISTICS))}")
+    return heuristic if weight == 1 else Weighted(heuristic, weight)
@@ -0,0 +1,195 @@
+# jobs.py (background solve jobs)
+#
+# A job runs ida_star on a worker thread and records its progress, so a
+# web request can start a solve, return at once, and poll for the result.
+# Cancellation is cooperative: the search calls the job's check() every few
+# thousand nodes, which raises SearchCancelled once the job is cancelled.
+# A job may carry budget limits (see search.Budget), which start counting
+# when it starts running.
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import search
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class Saturated(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, puzzle, options, limits=None):
+        self.id = uuid.uuid4().hex
+        self.puzzle = puzzle
+        self.options = options
+        self.limits = limits
+        self.status = QUEUED
+        self.threshold = None
+        self.nodes = 0
+        self.moves = None
+        self.error = None
+        self.budget_exceeded = None
+        self.lower_bound = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.cancel_requested = False
+        self.future = None
+
+    def check(self):
+        if self.cancel_requested:
+            raise search.SearchCancelled()
+
+    def on_iteration(self, threshold, nodes):
+        self.threshold = threshold
+        self.nodes = nodes
+
+    def to_dict(self):
+        data = {
+            'id': self.id,
+            'status': self.status,
+            'puzzle': self.puzzle,
+            'threshold': self.threshold,
+            'nodes': self.nodes,
+        }
+        if self.started is not None:
+            data['time'] = (self.finished or time.time()) - self.started
+        if self.status == DONE:
+            data['moves'] = self.moves
+        if self.error:
+            data['error'] = self.error
+        if self.budget_exceeded:
+            data['budget_exceeded'] = self.budget_exceeded
+            data['lower_bound'] = self.lower_bound
+        return data
+
+
+class JobManager:
+    # Keeps up to max_jobs jobs, finished ones included, so their results
+    # can be fetched. At most workers + queue_size of them are queued or
+    # running; submit() raises Saturated past that, or when the table is
+    # full of unfinished jobs.
+    def __init__(self, workers=2, max_jobs=1000, queue_size=16):
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.max_jobs = max_jobs
+        self.max_active = workers + queue_size
+        self.jobs = OrderedDict()
+        self.lock = threading.Lock()
+
+    def submit(self, puzzle, limits=None, **options):
+        job = Job(puzzle, options, limits)
+        with self.lock:
+            if self.active() >= self.max_active:
+                raise Saturated()
+            self._evict()
+            if len(self.jobs) >= self.max_jobs:
+                raise Saturated()
+            self.jobs[job.id] = job
+            # Under the lock, so cancel() always sees the future
+            job.future = self.executor.submit(self._run, job)
+        return job
+
+    def active(self):
+        return sum(1 for job in self.jobs.values() if job.status not in FINISHED)
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def cancel(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            job.cancel_requested = True
+            if job.future.cancel():
+                job.status = CANCELLED
+                job.finished = time.time()
+        return job
+
+    def _evict(self):
+        # Drop the oldest finished jobs until there is room for one more.
+        # Unfinished jobs are kept, so the table may still be full.
+        while len(self.jobs) >= self.max_jobs:
+            for job_id, job in self.jobs.items():
+                if job.status in FINISHED:
+                    del self.jobs[job_id]
+                    break
+            else:
+                return
+
+    def _run(self, job):
+        if job.cancel_requested:
+            job.status = CANCELLED
+            job.finished = time.time()
+            return
+        job.status = RUNNING
+        job.started = time.time()
+        stats = search.SearchStats()
+        try:
+            budget = search.Budget(**job.limits) if job.limits else None
+            moves = search.ida_star(job.puzzle, stats=stats, on_iteration=job.on_iteration, check=job.check,
+                                    budget=budget, **job.options)
+        except search.BudgetExceeded as e:
+            job.status = FAILED
+            job.error = f'Search budget exhausted ({e.reason}).'
+            job.budget_exceeded = e.reason
+            job.lower_bound = e.bound
+            job.nodes = e.nodes
+        except search.SearchCancelled:
+            job.status = CANCELLED
+        except Exception as e:
+            job.status = FAILED
+            job.error = f'An error occurred: {str(e)}'
+        else:
+            if moves is None:
+                job.status = FAILED
+                job.error = 'No solution found within reasonable time. The puzzle may be too complex.'
+            else:
+                job.status = DONE
+                job.moves = moves
+                job.nodes = stats.nodes
+        job.finished = time.time()
+
+
+class SolvePool:
+    # A fixed number of solver threads with a bounded queue in front of
+    # them. submit() raises Saturated instead of queueing past the limit,
+    # so a burst of hard puzzles is turned away instead of piling up.
+    def __init__(self, workers=2, queue_size=8):
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.workers = workers
+        self.capacity = workers + queue_size
+        self.slots = threading.BoundedSemaphore(self.capacity)
+        self.in_use = 0
+        self.lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        if not self.slots.acquire(blocking=False):
+            raise Saturated()
+        with self.lock:
+            self.in_use += 1
+        try:
+            future = self.executor.submit(fn, *args, **kwargs)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    def _release(self):
+        with self.lock:
+            self.in_use -= 1
+        self.slots.release()
+
+    def queued(self):
+        return max(self.in_use - self.workers, 0)
@@ -0,0 +1,171 @@
+# modes.py (solve modes: optimal IDA* and faster sub-optimal searches)
+#
+#   optimal   IDA*, shortest solution (see search.py)
+#   weighted  weighted IDA*, at most weight times the shortest
+#   beam      beam search keeping the width boards with the smallest h
+#             per depth; milliseconds, no bound on the length
+#   anytime   beam search first, then weighted IDA* with falling weights
+#             until the deadline; returns the best solution found, which
+#             is the shortest once a weight 1 pass finishes
+#   bidirectional
+#             MM bidirectional search (see bidirectional.py), shortest
+#             solution; falls back to IDA* past its memory cap
+#
+# solve() returns (moves, optimal) where optimal says the moves are known
+# to be a shortest solution. Only those should be cached or stored.
+import heapq
+import time
+
+import bidirectional
+import board
+import grid
+import search
+
+MODES = ('optimal', 'weighted', 'beam', 'anytime', 'bidirectional')
+DEFAULT_WEIGHT = 1.5
+DEFAULT_WIDTH = 100
+DEFAULT_DEADLINE = 1.0
+# Weights tried in turn by the anytime mode
+ANYTIME_WEIGHTS = (3, 2, 1.5, 1.25, 1)
+
+
+def beam_search(start, heuristic='manhattan_linear_conflict', width=DEFAULT_WIDTH, stats=None, check=None,
+                budget=None):
+    # Breadth-first by depth, keeping only the width boards with the
+    # smallest h at each depth. Boards already reached are never revisited,
+    # so the path has no cycles. check() and the budget are called once
+    # per depth.
+    geometry = grid.geometry(start)
+    heur = grid.get_heuristic(geometry, heuristic)
+    state, blank = geometry.pack(start)
+    parents = {state: None}
+    layer = [(state, blank)]
+    nodes = 0
+    depth = 0
+    check = search.with_budget(check, budget)
+    if budget is not None:
+        budget.nodes = lambda: nodes
+    goal = state if state == geometry.GOAL_STATE else None
+
+    while layer and goal is None:
+        candidates = []
+        for state, blank in layer:
+            nodes += 1
+            h = heur.reset(state, blank)
+            for move, target in geometry.NEIGHBORS[blank]:
+                child = geometry.slide(state, blank, target)
+                if child in parents:
+                    continue
+                parents[child] = (state, move)
+                if child == geometry.GOAL_STATE:
+                    goal = child
+                    break
+                tile = geometry.tile_at(state, target)
+                candidates.append((heur.step(h, state, child, tile, target, blank), child, target))
+                heur.unstep(tile, target, blank)
+            if goal is not None:
+                break
+        depth += 1
+        if stats is not None:
+            stats.record(depth, nodes)
+        if check:
+            try:
+                check()
+            except search.BudgetExceeded as e:
+                e.nodes = nodes
+                raise
+        layer = [(child, target) for _, child, target in heapq.nsmallest(width, candidates)]
+
+    if goal is None:
+        return None
+    moves = []
+    while parents[goal] is not None:
+        goal, move = parents[goal]
+        moves.append(board.MOVES[move])
+    moves.reverse()
+    return moves
+
+
+def anytime(start, heuristic='manhattan_linear_conflict', deadline=DEFAULT_DEADLINE, width=DEFAULT_WIDTH,
+            pruning='parent', stats=None, check=None, budget=None, on_solution=None):
+    # Returns (moves, optimal). Each improvement is passed to
+    # on_solution(moves). A budget's deadline is lowered to this one;
+    # when it runs out the best solution so far is returned. A node limit
+    # in the budget applies to each pass on its own.
+    budget = budget or search.Budget()
+    end = time.monotonic() + deadline
+    budget.deadline = min(budget.deadline, end) if budget.deadline else end
+    best = None
+    # Nodes expanded by the passes that finished
+    spent = 0
+
+    def improve(moves):
+        nonlocal best
+        if moves is not None and (best is None or len(moves) < len(best)):
+            best = moves
+            if on_solution:
+                on_solution(moves)
+
+    class Proven(Exception):
+        pass
+
+    def stop_at_best(threshold, nodes):
+        # Every shorter solution has been ruled out
+        if best is not None and threshold >= len(best):
+            raise Proven()
+
+    def run_pass(weight):
+        # One search, its counts added to stats. A pass that runs out
+        # reports the nodes of every pass so far.
+        nonlocal spent
+        pass_stats = search.SearchStats()
+        try:
+            if weight is None:
+                moves = beam_search(start, heuristic, width, pass_stats, check, budget)
+            else:
+                moves = search.ida_star(start, heuristic, pruning, stats=pass_stats, check=check, budget=budget,
+                                        weight=weight, on_iteration=stop_at_best if weight == 1 else None)
+            spent += pass_stats.nodes
+            return moves
+        except search.BudgetExceeded as e:
+            e.nodes = spent + (e.nodes or 0)
+            raise
+        finally:
+            if stats is not None:
+                stats.nodes += pass_stats.nodes
+                stats.iterations += pass_stats.iterations
+                stats.threshold = pass_stats.threshold
+
+    try:
+        improve(run_pass(None))
+        for weight in ANYTIME_WEIGHTS:
+            try:
+                improve(run_pass(weight))
+            except Proven:
+                return best, True
+            if weight == 1:
+                return best, True
+    except search.BudgetExceeded:
+        if best is None:
+            raise
+    return best, False
+
+
+def solve(start, mode='optimal', heuristic='manhattan_linear_conflict', weight=DEFAULT_WEIGHT, width=DEFAULT_WIDTH,
+          deadline=DEFAULT_DEADLINE, max_memory=bidirectional.DEFAULT_MAX_MEMORY, **options):
+    # Returns (moves, optimal). options go to search.ida_star (stats,
+    # check, budget, ...); the beam and anytime modes take the ones they
+    # share with it.
+    if mode == 'optimal':
+        return search.ida_star(start, heuristic, **options), True
+    if mode == 'weighted':
+        return search.ida_star(start, heuristic, weight=weight, **options), weight == 1
+    if mode == 'beam':
+        return beam_search(start, heuristic, width, options.get('stats'), options.get('check'),
+                           options.get('budget')), False
+    if mode == 'anytime':
+        return anytime(start, heuristic, deadline, width, options.get('pruning', 'parent'), options.get('stats'),
+                       options.get('check'), options.get('budget'))
+    if mode == 'bidirectional':
+        return bidirectional.bidirectional(start, heuristic, max_memory, **options), True
+    raise ValueError(f"Unknown mode '{mode}'. Choose from: {', '.join(MODES)}")
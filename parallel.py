@@ -0,0 +1,200 @@
+# parallel.py (IDA* across a process pool)
+#
+# Each IDA* iteration is split at a fixed frontier depth: the parent walks
+# the first few moves with the iteration's threshold and hands every
+# frontier node's subtree to a worker process. Frontier items are kept in
+# the order the serial search would reach them, and the answer is the
+# solution of the first item that has one, so the parallel search returns
+# exactly the move list the serial ida_star does.
+#
+# When item i finds the goal, all items after i are cancelled through a
+# shared cutoff index that workers poll while searching; items before i
+# still run to completion because one of them may hold the serial answer.
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import board
+import heuristics
+from pruning import get_pruner
+from search import FOUND, INF, BudgetExceeded, Counters, SearchCancelled, make_search, with_budget
+
+# Aim for this many frontier items per worker, so slow subtrees even out
+ITEMS_PER_WORKER = 8
+MAX_FRONTIER_DEPTH = 10
+# Seconds between check() calls while waiting for workers
+CHECK_INTERVAL = 0.1
+
+_cutoff = None
+_heuristics = {}
+
+
+def _init_worker(cutoff):
+    global _cutoff
+    _cutoff = cutoff
+
+
+def _search_subtree(index, state, blank, g, fstate, threshold, heuristic, pruning, detailed=False, weight=1):
+    # Returns (FOUND, moves below this node, nodes, counters) or (bound,
+    # None, nodes, counters) where bound is the smallest f that exceeded
+    # the threshold and counters is a Counters when detailed, else None.
+    if (heuristic, weight) not in _heuristics:
+        _heuristics[heuristic, weight] = heuristics.get_heuristic(heuristic, weight)
+    heur = _heuristics[heuristic, weight]
+
+    def check():
+        if _cutoff.value < index:
+            raise SearchCancelled()
+
+    moves = []
+    counters = Counters() if detailed else None
+    search, nodes = make_search(heur, get_pruner(pruning), moves, check, counters)
+    if counters is not None:
+        counters.resets += 1
+    try:
+        temp = search(state, blank, g, heur.reset(state, blank), threshold, fstate)
+    except SearchCancelled:
+        return None, None, nodes(), counters
+    return temp, (moves if temp == FOUND else None), nodes(), counters
+
+
+def frontier_depth(workers, fsm):
+    # Smallest depth with enough distinct move paths to keep every worker busy
+    paths = [0]
+    depth = 0
+    while len(paths) < ITEMS_PER_WORKER * workers and depth < MAX_FRONTIER_DEPTH:
+        paths = [nxt for fstate in paths for move in range(len(board.MOVES))
+                 if (nxt := fsm[(fstate << 2) + move]) >= 0]
+        depth += 1
+    return depth
+
+
+def expand_frontier(heur, fsm, state, blank, threshold, depth, counters=None):
+    # Walk the first depth moves in serial search order. Returns the
+    # frontier items, ('node', state, blank, g, fstate, moves) or
+    # ('goal', moves), the smallest f above threshold cut off on the way,
+    # and the number of nodes expanded. Counts into counters if given.
+    items = []
+    moves = []
+    bound = INF
+    nodes = 0
+
+    def walk(state, blank, g, h, fstate):
+        nonlocal bound, nodes
+        f = g + h
+        if f > threshold:
+            bound = min(bound, f)
+            return False
+        if state == board.GOAL_STATE:
+            items.append(('goal', list(moves)))
+            return True
+        if g == depth:
+            items.append(('node', state, blank, g, fstate, list(moves)))
+            return False
+        nodes += 1
+        for move, target in board.NEIGHBORS[blank]:
+            next_fstate = fsm[(fstate << 2) + move]
+            if counters is not None:
+                counters.lookups += 1
+                counters.generated += next_fstate >= 0
+            if next_fstate < 0:
+                continue
+            tile = board.tile_at(state, target)
+            child = board.slide(state, blank, target)
+            moves.append(move)
+            found = walk(child, target, g + 1, heur.step(h, state, child, tile, target, blank), next_fstate)
+            heur.unstep(tile, target, blank)
+            moves.pop()
+            if found:
+                return True
+        return False
+
+    if counters is not None:
+        counters.resets += 1
+    walk(state, blank, 0, heur.reset(state, blank), 0)
+    return items, bound, nodes
+
+
+def ida_star(start, heuristic='manhattan_linear_conflict', pruning='parent', max_iterations=None, on_iteration=None,
+             workers=None, stats=None, check=None, budget=None, weight=1):
+    # check() and the budget are polled by the parent while workers run;
+    # when they raise SearchCancelled every worker is stopped through the
+    # cutoff index. The budget's node count is the parent's running total.
+    workers = workers or os.cpu_count() or 1
+    state, blank = board.pack(start)
+    heur = heuristics.get_heuristic(heuristic, weight)
+    fsm = get_pruner(pruning)
+    depth = frontier_depth(workers, fsm)
+    threshold = heur.reset(state, blank)
+    nodes = 0
+    detailed = stats is not None and stats.detailed
+    counters = Counters() if detailed else None
+    cutoff = multiprocessing.Value('q', 0, lock=False)
+    check = with_budget(check, budget)
+    if budget is not None:
+        budget.nodes = lambda: nodes
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(cutoff,)) as pool:
+            iterations = 0
+            while max_iterations is None or iterations < max_iterations:
+                if on_iteration:
+                    on_iteration(threshold, nodes)
+                items, bound, expanded = expand_frontier(heur, fsm, state, blank, threshold, depth, counters)
+                nodes += expanded
+                cutoff.value = len(items)
+                futures = {}
+                for index, item in enumerate(items):
+                    if item[0] == 'goal':
+                        # Nothing after this item can be the serial answer
+                        cutoff.value = index
+                        break
+                    _, node, node_blank, g, fstate, _ = item
+                    futures[pool.submit(_search_subtree, index, node, node_blank, g, fstate, threshold,
+                                        heuristic, pruning, detailed, weight)] = index
+                best = cutoff.value if cutoff.value < len(items) else None
+                solutions = {}
+                pending = set(futures)
+                while pending:
+                    done, pending = wait(pending, timeout=CHECK_INTERVAL if check else None,
+                                         return_when=FIRST_COMPLETED)
+                    if check:
+                        try:
+                            check()
+                        except SearchCancelled:
+                            cutoff.value = -1
+                            for future in pending:
+                                future.cancel()
+                            raise
+                    for future in done:
+                        if future.cancelled():
+                            continue
+                        index = futures[future]
+                        temp, below, expanded, counted = future.result()
+                        nodes += expanded
+                        if counted is not None:
+                            counters.add(counted)
+                        if temp == FOUND:
+                            solutions[index] = below
+                            if best is None or index < best:
+                                best = cutoff.value = index
+                                for other in pending:
+                                    if futures[other] > index:
+                                        other.cancel()
+                        elif temp is not None and temp < bound:
+                            bound = temp
+                if stats is not None:
+                    stats.record(threshold, nodes, counters)
+                if best is not None:
+                    item = items[best]
+                    path = item[1] if item[0] == 'goal' else item[5] + solutions[best]
+                    return [board.MOVES[m] for m in path]
+                if bound == INF:
+                    return None
+                threshold = bound
+                iterations += 1
+    except BudgetExceeded as e:
+        e.bound = threshold if weight == 1 else None
+        e.nodes = nodes
+        raise
+    return None
@@ -0,0 +1,224 @@
+# pattern_db.py (additive disjoint pattern databases)
+#
+# The 15 tiles are split into disjoint groups. For each group a table holds
+# the exact number of moves of that group's tiles needed to bring them home,
+# ignoring the other tiles; since only moves of the group's own tiles are
+# counted, the values of all groups can be added up.
+#
+# A table is indexed by the cells of the group's tiles, 4 bits each in group
+# order (cell of the first tile in the lowest nibble), so a group of k tiles
+# takes 16**k bytes and a move changes the index by (to - frm) << 4*slot.
+#
+# Generate tables offline, and check a file's checksum, with:
+#   python pattern_db.py [partition] [output file]
+#   python pattern_db.py verify [file]
+import mmap
+import os
+import struct
+import sys
+import time
+import zlib
+
+from board import CELLS, NEIGHBORS
+
+PARTITIONS = {
+    '663': ((1, 5, 6, 9, 10, 13), (7, 8, 11, 12, 14, 15), (2, 3, 4)),
+    '555': ((1, 2, 3, 4, 7), (5, 6, 9, 10, 13), (8, 11, 12, 14, 15)),
+    '33333': ((1, 2, 3), (4, 7, 8), (5, 9, 13), (6, 10, 11), (12, 14, 15)),
+}
+DEFAULT_PARTITION = '663'
+DEFAULT_PATH = os.environ.get(
+    'PUZZLE_PDB', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pdb', f'{DEFAULT_PARTITION}.pdb'))
+
+# File layout: magic, version, number of groups, per group the tile count
+# and tiles, the total table length and CRC32 of the tables, a CRC32 of
+# everything before it, then the tables back to back in group order.
+#
+# Files are opened with mmap, so every process that loads the same file
+# shares one page-cache copy and pages are read only when first touched.
+# The header is always checked; the table checksum needs a full read, so
+# it is only verified on request (PUZZLE_PDB_VERIFY=1, or
+# python pattern_db.py verify <file>).
+MAGIC = b'P15D'
+VERSION = 2
+UNSEEN = 255
+VERIFY = os.environ.get('PUZZLE_PDB_VERIFY', '') == '1'
+
+
+def pattern_index(state, tiles):
+    cells = {}
+    for cell in range(CELLS):
+        cells[(state >> (cell << 2)) & 15] = cell
+    index = 0
+    for slot, tile in enumerate(tiles):
+        index |= cells[tile] << (slot << 2)
+    return index
+
+
+def generate(tiles):
+    # Breadth-first search backwards from the goal over (group cells, blank
+    # cell). Sliding a group tile costs 1, moving the blank through other
+    # tiles costs 0, so each cost layer is closed under free moves before
+    # the next layer starts.
+    k = len(tiles)
+    table = bytearray([UNSEEN]) * (16 ** k)
+    seen = bytearray((16 ** (k + 1) + 7) // 8)
+    start = 0
+    for slot, tile in enumerate(tiles):
+        start |= (tile - 1) << (slot << 2)
+    frontier = [(start << 4) | (CELLS - 1)]
+    cost = 0
+    while frontier:
+        next_frontier = []
+        stack = frontier
+        while stack:
+            code = stack.pop()
+            if seen[code >> 3] & (1 << (code & 7)):
+                continue
+            seen[code >> 3] |= 1 << (code & 7)
+            index, blank = code >> 4, code & 15
+            if table[index] == UNSEEN:
+                table[index] = cost
+            cells = [(index >> (slot << 2)) & 15 for slot in range(k)]
+            for _, target in NEIGHBORS[blank]:
+                if target in cells:
+                    slot = cells.index(target)
+                    moved = index + ((blank - target) << (slot << 2))
+                    next_frontier.append((moved << 4) | target)
+                else:
+                    stack.append((index << 4) | target)
+        frontier = next_frontier
+        cost += 1
+    return table
+
+
+def save(path, groups, tables):
+    header = struct.pack('<4sBB', MAGIC, VERSION, len(groups))
+    for tiles in groups:
+        header += struct.pack('<B', len(tiles)) + bytes(tiles)
+    checksum = 0
+    for table in tables:
+        checksum = zlib.crc32(table, checksum)
+    header += struct.pack('<QI', sum(len(table) for table in tables), checksum)
+    header += struct.pack('<I', zlib.crc32(header))
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    # Write to a temporary file and rename, so a process that maps the old
+    # file never sees a half-written one.
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        for table in tables:
+            f.write(table)
+    os.replace(tmp_path, path)
+
+
+def read_header(data, path):
+    if len(data) < 6:
+        raise ValueError(f"'{path}' is not a pattern database file")
+    magic, version, count = struct.unpack_from('<4sBB', data, 0)
+    if magic != MAGIC:
+        raise ValueError(f"'{path}' is not a pattern database file")
+    if version != VERSION:
+        raise ValueError(f"'{path}' has format version {version}, expected {VERSION}. Regenerate it.")
+    offset = 6
+    groups = []
+    for _ in range(count):
+        k = data[offset]
+        groups.append(tuple(data[offset + 1:offset + 1 + k]))
+        offset += 1 + k
+    length, checksum = struct.unpack_from('<QI', data, offset)
+    offset += 12
+    header_checksum, = struct.unpack_from('<I', data, offset)
+    if zlib.crc32(data[:offset]) != header_checksum:
+        raise ValueError(f"'{path}' has a corrupt header")
+    offset += 4
+    if length != sum(16 ** len(tiles) for tiles in groups) or offset + length != len(data):
+        raise ValueError(f"'{path}' is truncated or has the wrong size")
+    return groups, offset, checksum
+
+
+def load(path, verify=False):
+    with open(path, 'rb') as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    groups, offset, checksum = read_header(data, path)
+    view = memoryview(data)
+    if verify and zlib.crc32(view[offset:]) != checksum:
+        raise ValueError(f"'{path}' failed its checksum. Regenerate it.")
+    tables = []
+    for tiles in groups:
+        size = 16 ** len(tiles)
+        tables.append(view[offset:offset + size])
+        offset += size
+    return groups, tables
+
+
+_loaded = {}
+
+
+def load_cached(path=None):
+    path = path or DEFAULT_PATH
+    if path not in _loaded:
+        if not os.path.exists(path):
+            raise FileNotFoundError(
+                f"Pattern database '{path}' not found. Generate it with: python pattern_db.py {DEFAULT_PARTITION} {path}")
+        _loaded[path] = load(path, VERIFY)
+    return _loaded[path]
+
+
+class AdditivePatternDatabase:
+    name = 'pdb'
+
+    def __init__(self, path=None):
+        groups, self.tables = load_cached(path)
+        self.groups = groups
+        # For every tile: which group it is in and its nibble in the index
+        self.group_of = [0] * CELLS
+        self.shift_of = [0] * CELLS
+        for g, tiles in enumerate(groups):
+            for slot, tile in enumerate(tiles):
+                self.group_of[tile] = g
+                self.shift_of[tile] = slot << 2
+        self.index = [0] * len(groups)
+
+    def reset(self, state, blank):
+        h = 0
+        for g, tiles in enumerate(self.groups):
+            self.index[g] = pattern_index(state, tiles)
+            h += self.tables[g][self.index[g]]
+        return h
+
+    def step(self, h, state, child, tile, frm, to):
+        g = self.group_of[tile]
+        table = self.tables[g]
+        old = self.index[g]
+        new = self.index[g] = old + ((to - frm) << self.shift_of[tile])
+        return h + table[new] - table[old]
+
+    def unstep(self, tile, frm, to):
+        self.index[self.group_of[tile]] -= (to - frm) << self.shift_of[tile]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == 'verify':
+        path = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_PATH
+        try:
+            groups, _ = load(path, verify=True)
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        print(f"{path}: OK, groups {groups}")
+        sys.exit(0)
+    partition = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PARTITION
+    if partition not in PARTITIONS:
+        print(f"Error: unknown partition '{partition}'. Choose from: {', '.join(PARTITIONS)}")
+        sys.exit(1)
+    path = sys.argv[2] if len(sys.argv) > 2 else os.path.join(os.path.dirname(DEFAULT_PATH), f'{partition}.pdb')
+    groups = PARTITIONS[partition]
+    tables = []
+    for tiles in groups:
+        print(f"Generating table for tiles {tiles}...")
+        start_time = time.time()
+        tables.append(generate(tiles))
+        print(f"Done in {time.time() - start_time:.2f}s")
+    save(path, groups, tables)
+    print(f"Saved pattern database to {path}")
@@ -0,0 +1,117 @@
+# pruning.py (move-sequence pruning for IDA*)
+#
+# A pruner is a finite-state machine over move indices, stored flat:
+# table[state * 4 + move] is the next state, or -1 if the path would end
+# with a forbidden move sequence. The search starts in state 0 and carries
+# the machine state along the path, so each check is one list lookup.
+#
+# 'parent' only forbids undoing the previous move. 'fsm' also forbids
+# every move sequence up to FSM_MAX_LENGTH moves that reaches the same
+# board as a shorter one, or as an equally long one that comes first in
+# move order, as long as the kept sequence stays inside the cells the
+# forbidden one covers (so it is legal wherever the forbidden one is).
+# The first optimal solution in move order is never pruned.
+from board import MOVES, OPPOSITE
+
+FSM_MAX_LENGTH = 8
+_DELTAS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+
+def _effect(moves):
+    # Result of a move sequence on an unbounded board, relative to the
+    # starting cell of the blank, plus the bounding box it covers.
+    cells = {}
+    blank = (0, 0)
+    top = bottom = left = right = 0
+    for move in moves:
+        dx, dy = _DELTAS[move]
+        target = (blank[0] + dx, blank[1] + dy)
+        cells[blank] = cells.get(target, target)
+        cells[target] = None
+        blank = target
+        top, bottom = min(top, target[0]), max(bottom, target[0])
+        left, right = min(left, target[1]), max(right, target[1])
+    moved = frozenset((cell, tile) for cell, tile in cells.items() if tile != cell)
+    return (blank, moved), (top, bottom, left, right)
+
+
+def _inside(inner, outer):
+    return (outer[0] <= inner[0] and inner[1] <= outer[1]
+            and outer[2] <= inner[2] and inner[3] <= outer[3])
+
+
+def duplicate_sequences(max_length):
+    # Breadth-first over move sequences in move order, so the first
+    # sequence seen for a result is the one that is kept.
+    forbidden = [(move, OPPOSITE[move]) for move in range(len(MOVES))]
+    kept = {_effect(())[0]: (0, 0, 0, 0)}
+    frontier = [()]
+    for _ in range(max_length):
+        next_frontier = []
+        for sequence in frontier:
+            for move in range(len(MOVES)):
+                if sequence and OPPOSITE[sequence[-1]] == move:
+                    continue
+                extended = sequence + (move,)
+                result, box = _effect(extended)
+                if result in kept:
+                    if _inside(kept[result], box):
+                        forbidden.append(extended)
+                        continue
+                else:
+                    kept[result] = box
+                next_frontier.append(extended)
+        frontier = next_frontier
+    return forbidden
+
+
+def build_fsm(forbidden):
+    # Aho-Corasick automaton over the forbidden sequences, flattened into
+    # a transition table where reaching the end of any of them gives -1.
+    n = len(MOVES)
+    trie = [[-1] * n]
+    final = [False]
+    for sequence in forbidden:
+        node = 0
+        for move in sequence:
+            if trie[node][move] < 0:
+                trie[node][move] = len(trie)
+                trie.append([-1] * n)
+                final.append(False)
+            node = trie[node][move]
+        final[node] = True
+    fail = [0] * len(trie)
+    table = [0] * (len(trie) * n)
+    queue = []
+    for move in range(n):
+        child = trie[0][move]
+        if child < 0:
+            table[move] = 0
+        else:
+            table[move] = child
+            queue.append(child)
+    for node in queue:
+        final[node] = final[node] or final[fail[node]]
+        for move in range(n):
+            child = trie[node][move]
+            if child < 0:
+                table[node * n + move] = table[fail[node] * n + move]
+            else:
+                fail[child] = table[fail[node] * n + move]
+                table[node * n + move] = child
+                queue.append(child)
+    return [-1 if final[nxt] else nxt for nxt in table]
+
+
+_pruners = {}
+
+
+def get_pruner(name):
+    if name not in _pruners:
+        if name == 'parent':
+            _pruners[name] = build_fsm([(move, OPPOSITE[move]) for move in range(len(MOVES))])
+        elif name == 'fsm':
+            _pruners[name] = build_fsm(duplicate_sequences(FSM_MAX_LENGTH))
+        else:
+            raise ValueError(f"Unknown pruning '{name}'. Choose from: parent, fsm")
+    return _pruners[name]
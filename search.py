@@ -0,0 +1,294 @@
+# search.py (IDA* over packed boards, see board.py)
+#
+# The search walks packed integer states and keeps the current path as a
+# list of move indices, so expanding a node never builds a board. The
+# heuristic value is carried down the path and updated per move (see
+# heuristics.py). Cycles are cut by a move-sequence pruner (see
+# pruning.py) instead of comparing against every board on the path.
+import os
+import time
+
+import board
+import grid
+from pruning import get_pruner
+
+FOUND = -1
+INF = float('inf')
+
+# How often (in expanded nodes, minus one) a search calls its check()
+CHECK_MASK = 4095
+
+
+class SearchCancelled(Exception):
+    pass
+
+
+class BudgetExceeded(SearchCancelled):
+    # Raised when a Budget runs out. The searches fill in nodes, the nodes
+    # expanded, and bound, the best lower bound on the solution length
+    # proven so far (every threshold below it was searched in full). bound
+    # stays None for searches that prove none, such as weighted IDA*.
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason
+        self.bound = None
+        self.nodes = None
+
+
+def resident_memory():
+    # Resident set size of this process in bytes
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class Budget:
+    # Limits on one search, checked with its check(): wall time in seconds
+    # from when the budget is made, expanded nodes, and growth of this
+    # process's resident memory in bytes. ida_star points nodes at its
+    # node counter.
+    def __init__(self, seconds=None, nodes=None, memory=None):
+        self.deadline = time.monotonic() + seconds if seconds else None
+        self.max_nodes = nodes
+        self.max_memory = memory
+        self.base_memory = resident_memory() if memory else 0
+        self.nodes = None
+
+    def check(self):
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise BudgetExceeded('time')
+        if self.max_nodes is not None and self.nodes is not None and self.nodes() > self.max_nodes:
+            raise BudgetExceeded('nodes')
+        if self.max_memory is not None and resident_memory() - self.base_memory > self.max_memory:
+            raise BudgetExceeded('memory')
+
+
+def with_budget(check, budget):
+    # check() followed by budget.check()
+    if budget is None:
+        return check
+    if check is None:
+        return budget.check
+
+    def both():
+        check()
+        budget.check()
+
+    return both
+
+
+class SearchStats:
+    # Filled in by ida_star when passed as stats=. With detailed=True the
+    # search also counts generated nodes, heuristic calls and pruned moves,
+    # and records every iteration. Counting wraps the heuristic and the
+    # pruner of that one search, so a search without it runs unchanged.
+    def __init__(self, detailed=False):
+        self.nodes = 0
+        self.iterations = 0
+        self.threshold = None
+        self.detailed = detailed
+        self.generated = 0
+        self.pruned = 0
+        self.heuristic_calls = 0
+        # One {'threshold', 'nodes', 'generated'} per finished iteration
+        self.per_threshold = []
+
+    def record(self, threshold, nodes, counters=None):
+        # Called by the driver after every iteration with running totals
+        self.iterations += 1
+        self.threshold = threshold
+        if counters is not None:
+            self.per_threshold.append({
+                'threshold': threshold,
+                'nodes': nodes - self.nodes,
+                'generated': counters.generated - self.generated
+            })
+            self.generated = counters.generated
+            self.pruned = counters.lookups - counters.generated
+            self.heuristic_calls = counters.generated + counters.resets
+        self.nodes = nodes
+
+    def to_dict(self):
+        data = {'nodes': self.nodes, 'iterations': self.iterations, 'threshold': self.threshold}
+        if self.detailed:
+            candidates = self.generated + self.pruned
+            data.update({
+                'generated': self.generated,
+                'heuristic_calls': self.heuristic_calls,
+                'pruned': self.pruned,
+                'pruning_rate': self.pruned / candidates if candidates else 0.0,
+                'per_threshold': self.per_threshold
+            })
+        return data
+
+
+class Counters:
+    # Running totals of a detailed search: children generated (one
+    # heuristic step each), pruner lookups (one per candidate move) and
+    # heuristic resets
+    def __init__(self):
+        self.generated = 0
+        self.lookups = 0
+        self.resets = 0
+
+    def add(self, other):
+        self.generated += other.generated
+        self.lookups += other.lookups
+        self.resets += other.resets
+
+
+class _CountingPruner:
+    def __init__(self, fsm, counters):
+        self.fsm = fsm
+        self.counters = counters
+
+    def __getitem__(self, index):
+        self.counters.lookups += 1
+        return self.fsm[index]
+
+
+def make_search(heur, fsm, moves, check=None, counters=None, geometry=board):
+    # Returns search(state, blank, g, h, threshold, fstate), the bounded
+    # depth-first search of one IDA* iteration, and nodes() giving the
+    # number of nodes it has expanded. Moves of the path below the start
+    # node are pushed onto moves. check() is called every CHECK_MASK + 1
+    # expanded nodes and may raise SearchCancelled to stop the search.
+    # Passing a Counters makes the search count into it. geometry is the
+    # board module or a grid.Grid; 4x4 boards get the nibble shifts
+    # inlined.
+    step = heur.step
+    if counters is not None:
+        heur_step = step
+        fsm = _CountingPruner(fsm, counters)
+
+        def step(h, state, child, tile, frm, to):
+            counters.generated += 1
+            return heur_step(h, state, child, tile, frm, to)
+    unstep = heur.unstep
+    if geometry is not board:
+        return _make_grid_search(geometry, step, unstep, fsm, moves, check)
+    neighbors = board.NEIGHBORS
+    goal_state = board.GOAL_STATE
+    nodes = 0
+
+    def search(state, blank, g, h, threshold, fstate):
+        nonlocal nodes
+        f = g + h
+        if f > threshold:
+            return f
+        if state == goal_state:
+            return FOUND
+        nodes += 1
+        if nodes & CHECK_MASK == 0 and check:
+            check()
+        min_cost = INF
+        base = fstate << 2
+        for move, target in neighbors[blank]:
+            next_fstate = fsm[base + move]
+            if next_fstate < 0:
+                continue
+            tile = (state >> (target << 2)) & 15
+            child = state ^ (tile << (target << 2)) ^ (tile << (blank << 2))
+            moves.append(move)
+            temp = search(child, target, g + 1, step(h, state, child, tile, target, blank), threshold, next_fstate)
+            unstep(tile, target, blank)
+            if temp == FOUND:
+                return FOUND
+            if temp < min_cost:
+                min_cost = temp
+            moves.pop()
+        return min_cost
+
+    return search, lambda: nodes
+
+
+def _make_grid_search(grid, step, unstep, fsm, moves, check):
+    # make_search for a grid.Grid, with its cell shifts looked up
+    neighbors = grid.NEIGHBORS
+    goal_state = grid.GOAL_STATE
+    shifts = grid.SHIFTS
+    mask = grid.MASK
+    nodes = 0
+
+    def search(state, blank, g, h, threshold, fstate):
+        nonlocal nodes
+        f = g + h
+        if f > threshold:
+            return f
+        if state == goal_state:
+            return FOUND
+        nodes += 1
+        if nodes & CHECK_MASK == 0 and check:
+            check()
+        min_cost = INF
+        base = fstate << 2
+        for move, target in neighbors[blank]:
+            next_fstate = fsm[base + move]
+            if next_fstate < 0:
+                continue
+            tile = (state >> shifts[target]) & mask
+            child = state ^ (tile << shifts[target]) ^ (tile << shifts[blank])
+            moves.append(move)
+            temp = search(child, target, g + 1, step(h, state, child, tile, target, blank), threshold, next_fstate)
+            unstep(tile, target, blank)
+            if temp == FOUND:
+                return FOUND
+            if temp < min_cost:
+                min_cost = temp
+            moves.pop()
+        return min_cost
+
+    return search, lambda: nodes
+
+
+def ida_star(start, heuristic='manhattan_linear_conflict', pruning='parent', max_iterations=None, on_iteration=None,
+             workers=1, stats=None, check=None, budget=None, weight=1):
+    # on_iteration(threshold, nodes) is called before each iteration with
+    # the number of nodes expanded so far; check() is passed on to
+    # make_search. workers > 1 splits each iteration across a process pool
+    # (see parallel.py). A SearchStats passed as stats= is filled in as
+    # the search goes. A Budget raises BudgetExceeded when it runs out.
+    # weight > 1 is weighted IDA* (f = g + weight * h), which is faster but
+    # only promises a solution at most weight times the optimal length.
+    # Boards other than 4x4 (see grid.py) are searched serially whatever
+    # workers says.
+    geometry = grid.geometry(start)
+    if workers > 1 and geometry is board:
+        import parallel
+        return parallel.ida_star(start, heuristic, pruning, max_iterations, on_iteration, workers, stats, check,
+                                 budget, weight)
+    state, blank = geometry.pack(start)
+    heur = grid.get_heuristic(geometry, heuristic, weight)
+    moves = []
+    counters = Counters() if stats is not None and stats.detailed else None
+    search, nodes = make_search(heur, get_pruner(pruning), moves, with_budget(check, budget), counters, geometry)
+    if budget is not None:
+        budget.nodes = nodes
+
+    h = heur.reset(state, blank)
+    if counters is not None:
+        counters.resets += 1
+    threshold = h
+    iterations = 0
+    try:
+        while max_iterations is None or iterations < max_iterations:
+            if on_iteration:
+                on_iteration(threshold, nodes())
+            temp = search(state, blank, 0, h, threshold, 0)
+            if stats is not None:
+                stats.record(threshold, nodes(), counters)
+            if temp == FOUND:
+                return [board.MOVES[m] for m in moves]
+            if temp == INF:
+                return None
+            threshold = temp
+            iterations += 1
+    except BudgetExceeded as e:
+        # Weighted thresholds are not bounds on the length
+        e.bound = threshold if weight == 1 else None
+        e.nodes = nodes()
+        raise
+    return None
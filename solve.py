@@ -1,163 +1,179 @@
 # solver.py (IDA* with Manhattan + Linear Conflict heuristic)
+import argparse
 import sys
 import math
 import time
-import pygame
 import os
-
-os.environ['SDL_VIDEO_WINDOW_POS'] = "100,100"
-
-# Goal configuration
-goal = [
-    [1, 2, 3, 4],
-    [5, 6, 7, 8],
-    [9, 10, 11, 12],
-    [13, 14, 15, 0]
-]
-
-goal_positions = {val: (i, j) for i, row in enumerate(goal) for j, val in enumerate(row)}
+import threading
+import board
+from board import MOVE_NAMES, apply_move, find_blank  # also importable from here
+import grid
+import heuristics
+import jobs
+import modes
+import search
+import store
 
 def read_puzzle(filename):
+    # One row per line; the number of lines and of numbers per line give
+    # the board size (4x4 for the 15-puzzle, 3x3 for the 8-puzzle, ...)
     with open(filename) as f:
-        puzzle = [list(map(int, line.strip().split())) for line in f.readlines()[:4]]
+        puzzle = [list(map(int, line.split())) for line in f if line.strip()]
     return puzzle
 
-def manhattan_linear_conflict(puzzle):
-    dist = 0
-    for i in range(4):
-        for j in range(4):
-            val = puzzle[i][j]
-            if val == 0:
-                continue
-            goal_i, goal_j = goal_positions[val]
-            dist += abs(goal_i - i) + abs(goal_j - j)
-            if goal_i == i:
-                for k in range(j + 1, 4):
-                    other = puzzle[i][k]
-                    if other != 0 and goal_positions[other][0] == i and goal_positions[other][1] < goal_j:
-                        dist += 2
-            if goal_j == j:
-                for k in range(i + 1, 4):
-                    other = puzzle[k][j]
-                    if other != 0 and goal_positions[other][1] == j and goal_positions[other][0] < goal_i:
-                        dist += 2
-    return dist
-
-def is_goal(p):
-    return p == goal
-
-def get_neighbors(board):
-    neighbors = []
-    for i in range(4):
-        for j in range(4):
-            if board[i][j] == 0:
-                x, y = i, j
-    directions = [(-1, 0, 'up'), (1, 0, 'down'), (0, -1, 'left'), (0, 1, 'right')]
-    for dx, dy, move in directions:
-        nx, ny = x + dx, y + dy
-        if 0 <= nx < 4 and 0 <= ny < 4:
-            new_board = [row[:] for row in board]
-            new_board[x][y], new_board[nx][ny] = new_board[nx][ny], new_board[x][y]
-            neighbors.append((new_board, move))
-    return neighbors
-
-def ida_star(start):
-    threshold = manhattan_linear_conflict(start)
-    path = [(start, None)]
-
-    def search(path, g, threshold):
-        node, _ = path[-1]
-        f = g + manhattan_linear_conflict(node)
-        if f > threshold:
-            return f
-        if is_goal(node):
-            return "FOUND"
-        min_cost = float('inf')
-        for neighbor, move in get_neighbors(node):
-            if any(prev[0] == neighbor for prev in path):
-                continue
-            path.append((neighbor, move))
-            temp = search(path, g + 1, threshold)
-            if temp == "FOUND":
-                return "FOUND"
-            if temp < min_cost:
-                min_cost = temp
-            path.pop()
-        return min_cost
-
-    while True:
+def ida_star(start, workers=1, on_iteration=None, **options):
+    def report(threshold, nodes):
         print(f"Searching with threshold {threshold}...")
-        temp = search(path, 0, threshold)
-        if temp == "FOUND":
-            return [m for _, m in path[1:]]
-        if temp == float('inf'):
-            return None
-        threshold = temp
-
-def draw_board(screen, board, font):
-    screen.fill((255, 255, 255))
-    screen_width, screen_height = screen.get_size()
-    board_width, board_height = 400, 400
-    offset_x = (screen_width - board_width) // 2
-    offset_y = (screen_height - board_height) // 2
-
-    for i in range(4):
-        for j in range(4):
-            val = board[i][j]
-            if val != 0:
-                pygame.draw.rect(screen, (100, 149, 237), (offset_x + j * 100 + 5, offset_y + i * 100 + 5, 90, 90))
-                text = font.render(str(val), True, (255, 255, 255))
-                rect = text.get_rect(center=(offset_x + j * 100 + 50, offset_y + i * 100 + 50))
-                screen.blit(text, rect)
-    pygame.display.flip()
-
-def apply_move(board, move):
-    for i in range(4):
-        for j in range(4):
-            if board[i][j] == 0:
-                x, y = i, j
-    dx, dy = 0, 0
-    if move == 'up': dx = -1
-    elif move == 'down': dx = 1
-    elif move == 'left': dy = -1
-    elif move == 'right': dy = 1
-    nx, ny = x + dx, y + dy
-    if 0 <= nx < 4 and 0 <= ny < 4:
-        board[x][y], board[nx][ny] = board[nx][ny], board[x][y]
-    return board
-
-def run_gui(start_board, solution):
-    pygame.init()
-    screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
-    pygame.display.set_caption("15 Puzzle Solver")
-    font = pygame.font.SysFont(None, 72)
-    board = [row[:] for row in start_board]
-    draw_board(screen, board, font)
-    index = 0
-    solved = False
-    print("\n✅ GUI loaded. Press SPACE to step through solution. Close the window to exit.")
-
-    running = True
-    while running:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_ESCAPE:
-                    running = False
-                elif event.key == pygame.K_SPACE and index < len(solution):
-                    move = solution[index]
-                    print(f"Move {index+1}/{len(solution)}: {move}")
-                    board = apply_move(board, move)
-                    draw_board(screen, board, font)
-                    index += 1
-                elif index == len(solution):
-                    print("🎉 Puzzle solved! Press close to exit.")
-        pygame.display.update()
-    pygame.quit()
+        if on_iteration:
+            on_iteration(threshold, nodes)
+    return search.ida_star(start, workers=workers, on_iteration=report, **options)
+
+class BackgroundSolve:
+    # Solves on a worker thread so the GUI can open at once, like a
+    # jobs.Job: the threshold is recorded every IDA* iteration, the node
+    # counter can be read at any time through a budget with no limits, and
+    # cancel() stops the search at its next check().
+    def __init__(self, puzzle, args, solution_store):
+        self.puzzle = puzzle
+        self.args = args
+        self.solution_store = solution_store
+        self.status = jobs.RUNNING
+        self.threshold = None
+        self.budget = search.Budget()
+        self.solution = None
+        self.optimal = False
+        self.started = time.time()
+        self.finished = None
+        self.cancel_requested = False
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def check(self):
+        if self.cancel_requested:
+            raise search.SearchCancelled()
+
+    def cancel(self):
+        self.cancel_requested = True
+
+    def on_iteration(self, threshold, nodes):
+        self.threshold = threshold
+
+    def nodes(self):
+        return self.budget.nodes() if self.budget.nodes else 0
+
+    def elapsed(self):
+        return (self.finished or time.time()) - self.started
+
+    def run(self):
+        try:
+            self.solution, self.optimal = solve_puzzle(self.puzzle, self.args, self.solution_store,
+                                                       on_iteration=self.on_iteration, check=self.check,
+                                                       budget=self.budget)
+        except search.SearchCancelled:
+            self.status = jobs.CANCELLED
+            print("Search cancelled.")
+        except Exception as e:
+            self.status = jobs.FAILED
+            print(f"Error: {e}")
+        else:
+            self.status = jobs.DONE if self.solution else jobs.FAILED
+            if self.solution:
+                print(f"Solved in {len(self.solution)} moves. Time: {self.elapsed():.2f}s")
+                write_output(self.solution, self.args.format)
+            else:
+                print("No solution found.")
+        self.finished = time.time()
+
+def solve_puzzle(puzzle, args, solution_store, **options):
+    # Returns (moves, optimal), from the store if it has the puzzle. options
+    # (on_iteration, check, budget) go to the search.
+    solution = solution_store.get(puzzle) if solution_store else None
+    if solution is not None:
+        print("Found puzzle in the solution store.")
+        return solution, True
+    print("Solving puzzle...")
+    if args.mode == "optimal":
+        solution, optimal = ida_star(puzzle, args.workers, heuristic=args.heuristic, **options), True
+    else:
+        solution, optimal = modes.solve(puzzle, args.mode, args.heuristic, weight=args.weight, width=args.width,
+                                        deadline=args.deadline, workers=args.workers, **options)
+        if solution and not optimal:
+            print("Note: this solution may not be the shortest.")
+    # Only shortest solutions go in the store
+    if solution and solution_store and optimal:
+        solution_store.put(puzzle, solution)
+    return solution, optimal
+
+def write_output(solution, move_format):
+    with open("output.txt", "w") as f:
+        if move_format == "compact":
+            f.write(board.encode_moves(solution) + "\n")
+        else:
+            for move in solution:
+                f.write(move + "\n")
+
+def run_gui(start_board, solver):
+    # pygame is only imported here, once a window is wanted (see gui.py)
+    import gui
+    gui.run_gui(start_board, solver)
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
+    parser = argparse.ArgumentParser(description="Solve a 15 puzzle with IDA* and step through the solution.")
+    parser.add_argument("puzzle", nargs="?",
+                        help="puzzle file (4 rows of 4 numbers, 0 is the empty space; "
+                             "other sizes such as 3x3 or 5x5 work with the default heuristic)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes for the search (default: 1); with --batch, puzzles solved at once "
+                             "(default: one per CPU)")
+    parser.add_argument("--store", default=os.environ.get("PUZZLE_STORE"),
+                        help="SQLite file of solved puzzles to read before and write after solving "
+                             "(default: $PUZZLE_STORE)")
+    parser.add_argument("--mode", choices=modes.MODES, default="optimal",
+                        help="optimal (default), weighted IDA*, beam search, anytime (best found by the deadline), "
+                             "or bidirectional (MM search, falls back to IDA* past its memory cap)")
+    parser.add_argument("--weight", type=float, default=modes.DEFAULT_WEIGHT,
+                        help="weighted mode: solution at most WEIGHT times the shortest "
+                             f"(default: {modes.DEFAULT_WEIGHT})")
+    parser.add_argument("--width", type=int, default=modes.DEFAULT_WIDTH,
+                        help=f"beam and anytime modes: boards kept per depth (default: {modes.DEFAULT_WIDTH})")
+    parser.add_argument("--deadline", type=float, default=modes.DEFAULT_DEADLINE,
+                        help=f"anytime mode: seconds to keep improving (default: {modes.DEFAULT_DEADLINE})")
+    parser.add_argument("--format", choices=("words", "compact"), default="words",
+                        help="output.txt as one move name per line, or one line of U/D/L/R letters "
+                             "(default: words)")
+    parser.add_argument("--heuristic", choices=sorted(heuristics.HEURISTICS), default="manhattan_linear_conflict",
+                        help="search heuristic; wd and pdb only work on 4x4 boards "
+                             "(default: manhattan_linear_conflict)")
+    parser.add_argument("--batch", metavar="SOURCE",
+                        help="solve many puzzles without the GUI: a directory of puzzle files, a file of puzzles "
+                             "separated by blank lines, a .jsonl file, or - for JSON Lines on stdin; writes one "
+                             "JSON line per puzzle as each finishes")
+    parser.add_argument("--out", help="with --batch, write the result lines to this file (default: stdout)")
+    parser.add_argument("--timeout", type=float, help="with --batch, seconds allowed per puzzle (default: none)")
+    args = parser.parse_args()
+
+    if args.batch:
+        import batch
+        out = open(args.out, "w") if args.out else sys.stdout
+        start_time = time.time()
+        try:
+            solved, failed = batch.run_batch(args.batch, out, args.workers, args.mode, args.heuristic, args.weight,
+                                             args.width, args.deadline, args.timeout, args.format, args.store)
+        except OSError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        finally:
+            if args.out:
+                out.close()
+        print(f"Solved {solved} of {solved + failed} puzzles in {time.time() - start_time:.2f}s", file=sys.stderr)
+        # Non-zero when any puzzle was invalid or went unsolved
+        sys.exit(1 if failed else 0)
+    args.workers = args.workers or 1
+
+    if args.puzzle is None:
         print("No puzzle file provided. Using default test puzzle.")
         puzzle = [
             [5, 1, 2, 3],
@@ -166,24 +182,23 @@ if __name__ == "__main__":
             [13, 14, 15, 12]
         ]
     else:
-        filename = sys.argv[1]
+        filename = args.puzzle
         if not os.path.exists(filename):
             print(f"Error: file '{filename}' not found.")
             sys.exit(1)
         print("Reading puzzle...")
-        puzzle = read_puzzle(filename)
-
-    print("Solving puzzle...")
-    start_time = time.time()
-    solution = ida_star(puzzle)
-    end_time = time.time()
-
-    if solution:
-        print(f"Solved in {len(solution)} moves. Time: {end_time - start_time:.2f}s")
-        with open("output.txt", "w") as f:
-            for move in solution:
-                f.write(move + "\n")
-        run_gui(puzzle, solution)
-    else:
-        print("No solution found.")
+        try:
+            puzzle = read_puzzle(filename)
+        except ValueError:
+            print("Error: the puzzle file must contain numbers only.")
+            sys.exit(1)
+        # Wrong sizes and unsolvable boards are turned away before the
+        # search starts, as in batch mode
+        error = grid.check_puzzle(puzzle)
+        if error:
+            print(f"Error: {error}")
+            sys.exit(1)
 
+    # The store is keyed by packed 4x4 boards
+    solution_store = store.open_store(args.store) if grid.geometry(puzzle) is board else None
+    run_gui(puzzle, BackgroundSolve(puzzle, args, solution_store).start())
@@ -0,0 +1,72 @@
+# store.py (persistent store of solved boards)
+#
+# An SQLite file shared by every process that opens it, so solutions survive
+# restarts and redeploys. Rows are keyed by the same canonical packed board
+# as the in-process cache (see cache.canonical) and hold the move string
+# (see board.encode_moves) and its length. A row is only replaced by a
+# shorter solution.
+import os
+import sqlite3
+import threading
+
+import board
+from cache import canonical
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS solutions (
+    state INTEGER PRIMARY KEY,
+    moves TEXT NOT NULL,
+    length INTEGER NOT NULL
+)
+'''
+
+
+def _to_sqlite(key):
+    # SQLite integers are signed 64-bit
+    return key - (1 << 64) if key >= 1 << 63 else key
+
+
+class SolutionStore:
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+        self._connect()
+
+    def _connect(self):
+        # One connection per thread (and per process, since each process
+        # opens its own after fork)
+        conn = getattr(self.local, 'conn', None)
+        if conn is None or self.local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(_SCHEMA)
+            self.local.conn = conn
+            self.local.pid = os.getpid()
+        return conn
+
+    def get(self, puzzle):
+        key, transposed = canonical(puzzle)
+        row = self._connect().execute('SELECT moves FROM solutions WHERE state = ?', (_to_sqlite(key),)).fetchone()
+        if row is None:
+            return None
+        moves = board.decode_moves(row[0])
+        return board.transpose_moves(moves) if transposed else moves
+
+    def put(self, puzzle, moves):
+        key, transposed = canonical(puzzle)
+        if transposed:
+            moves = board.transpose_moves(moves)
+        self._connect().execute(
+            'INSERT INTO solutions (state, moves, length) VALUES (?, ?, ?) '
+            'ON CONFLICT(state) DO UPDATE SET moves = excluded.moves, length = excluded.length '
+            'WHERE excluded.length < solutions.length',
+            (_to_sqlite(key), board.encode_moves(moves), len(moves)))
+
+    def __len__(self):
+        return self._connect().execute('SELECT COUNT(*) FROM solutions').fetchone()[0]
+
+
+def open_store(path):
+    # None (no store) unless a path is given
+    return SolutionStore(path) if path else None
@@ -0,0 +1,94 @@
+# walking_distance.py (walking-distance heuristic)
+#
+# Vertically, the board is summarised by a 4x4 matrix: count[i][j] is how
+# many tiles in row i belong in row j. Walking distance is the number of
+# vertical moves needed to turn that matrix into the goal's, where a move
+# takes any tile from a row next to the blank's row into the blank's row.
+# The same table applies to columns, and the two distances add up.
+#
+# A matrix is encoded as sum(count[i][j] * 5**(4*i + j)), so a move changes
+# the code by one add, and the table (~25k entries) is built once per
+# process by breadth-first search from the goal.
+from board import SIZE, CELLS
+
+# WEIGHT[i][j] -> code contribution of one tile in line i that belongs in line j
+WEIGHT = [[5 ** (SIZE * i + j) for j in range(SIZE)] for i in range(SIZE)]
+
+# VERTICAL[val][cell], HORIZONTAL[val][cell] -> code contribution of tile val at cell
+VERTICAL = [[0] * CELLS for _ in range(CELLS)]
+HORIZONTAL = [[0] * CELLS for _ in range(CELLS)]
+for _val in range(1, CELLS):
+    _goal_row, _goal_col = divmod(_val - 1, SIZE)
+    for _cell in range(CELLS):
+        VERTICAL[_val][_cell] = WEIGHT[_cell // SIZE][_goal_row]
+        HORIZONTAL[_val][_cell] = WEIGHT[_cell % SIZE][_goal_col]
+
+_table = None
+
+
+def _build_table():
+    counts = [[SIZE if i == j else 0 for j in range(SIZE)] for i in range(SIZE)]
+    counts[SIZE - 1][SIZE - 1] -= 1
+    goal_code = sum(counts[i][j] * WEIGHT[i][j] for i in range(SIZE) for j in range(SIZE))
+    table = {goal_code: 0}
+    frontier = [(goal_code, SIZE - 1)]
+    depth = 0
+    while frontier:
+        depth += 1
+        next_frontier = []
+        for code, blank_row in frontier:
+            for row in (blank_row - 1, blank_row + 1):
+                if not 0 <= row < SIZE:
+                    continue
+                for j in range(SIZE):
+                    if (code // WEIGHT[row][j]) % 5 == 0:
+                        continue
+                    moved = code - WEIGHT[row][j] + WEIGHT[blank_row][j]
+                    if moved not in table:
+                        table[moved] = depth
+                        next_frontier.append((moved, row))
+        frontier = next_frontier
+    return table
+
+
+def get_table():
+    global _table
+    if _table is None:
+        _table = _build_table()
+    return _table
+
+
+def walking_distance(state):
+    vertical = horizontal = 0
+    for cell in range(CELLS):
+        val = (state >> (cell << 2)) & 15
+        vertical += VERTICAL[val][cell]
+        horizontal += HORIZONTAL[val][cell]
+    table = get_table()
+    return table[vertical] + table[horizontal]
+
+
+class WalkingDistance:
+    name = 'wd'
+
+    def __init__(self):
+        self.table = get_table()
+        self.vertical = self.horizontal = 0
+
+    def reset(self, state, blank):
+        self.vertical = self.horizontal = 0
+        for cell in range(CELLS):
+            val = (state >> (cell << 2)) & 15
+            self.vertical += VERTICAL[val][cell]
+            self.horizontal += HORIZONTAL[val][cell]
+        return self.table[self.vertical] + self.table[self.horizontal]
+
+    def step(self, h, state, child, tile, frm, to):
+        # Only one of the two codes actually changes
+        self.vertical += VERTICAL[tile][to] - VERTICAL[tile][frm]
+        self.horizontal += HORIZONTAL[tile][to] - HORIZONTAL[tile][frm]
+        return self.table[self.vertical] + self.table[self.horizontal]
+
+    def unstep(self, tile, frm, to):
+        self.vertical -= VERTICAL[tile][to] - VERTICAL[tile][frm]
+        self.horizontal -= HORIZONTAL[tile][to] - HORIZONTAL[tile][frm]